@@ -0,0 +1,94 @@
+"""
+Load test: /detect throughput and latency
+Sends the same image from many concurrent clients to a running API server
+(Flask: python run_api.py, async: python run_api.py --asgi) and reports
+requests per second and latency percentiles.
+Every upload gets a unique trailer after the image data (decoders ignore
+it), so the server's response cache never turns requests into hits.
+"""
+
+import argparse
+import itertools
+import threading
+import time
+
+import numpy as np
+import requests
+
+
+_upload_ids = itertools.count()
+
+
+def unique_upload(img_bytes):
+    """
+    Same image, different bytes: defeats the server's response cache
+    """
+    return img_bytes + f"bench-{next(_upload_ids)}".encode()
+
+
+def client(url, img_bytes, count, latencies, errors, lock):
+    session = requests.Session()
+    for _ in range(count):
+        data = unique_upload(img_bytes)
+        started = time.perf_counter()
+        try:
+            response = session.post(url, files={"image": ("image.jpg", data, "image/jpeg")})
+            ok = response.status_code == 200
+        except requests.RequestException:
+            ok = False
+        elapsed = (time.perf_counter() - started) * 1000
+
+        with lock:
+            if ok:
+                latencies.append(elapsed)
+            else:
+                errors.append(elapsed)
+
+
+def run(url, img_bytes, concurrency, requests_per_client):
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    threads = [
+        threading.Thread(target=client, args=(url, img_bytes, requests_per_client, latencies, errors, lock))
+        for _ in range(concurrency)
+    ]
+
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    lat = np.array(latencies) if latencies else np.zeros(1)
+    print(
+        f"{concurrency:>4} clients | {len(latencies) / elapsed:7.1f} req/s | "
+        f"p50 {np.percentile(lat, 50):7.0f} ms | p95 {np.percentile(lat, 95):7.0f} ms | "
+        f"p99 {np.percentile(lat, 99):7.0f} ms | errors {len(errors)}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the /detect endpoint")
+    parser.add_argument("image", help="Image to upload")
+    parser.add_argument("--url", default="http://127.0.0.1:5000/detect")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=10, help="Requests per client")
+    args = parser.parse_args()
+
+    with open(args.image, "rb") as f:
+        img_bytes = f.read()
+
+    # Wait for warm-up so the first model load is not measured
+    ready_url = args.url.rsplit("/", 1)[0] + "/ready"
+    while requests.get(ready_url).status_code != 200:
+        time.sleep(0.5)
+
+    print(f"Load test: {args.url}")
+    for concurrency in args.concurrency:
+        run(args.url, img_bytes, concurrency, args.requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark: /detect/batch versus one /detect call per image
+Uploads the same burst of photos both ways to a running API server and
+compares wall time per burst.
+Uploads carry a unique trailer after the image data (decoders ignore it),
+so single /detect calls are never answered from the response cache.
+"""
+
+import argparse
+import glob
+import itertools
+import os
+import time
+
+import requests
+
+
+_upload_ids = itertools.count()
+
+
+def unique_upload(data):
+    """
+    Same image, different bytes: defeats the server's response cache
+    """
+    return data + f"bench-{next(_upload_ids)}".encode()
+
+
+def single_calls(base_url, images, session):
+    for name, data in images:
+        response = session.post(f"{base_url}/detect", files={"image": (name, unique_upload(data), "image/jpeg")})
+        response.raise_for_status()
+
+
+def batch_call(base_url, images, session):
+    files = [("images", (name, unique_upload(data), "image/jpeg")) for name, data in images]
+    response = session.post(f"{base_url}/detect/batch", files=files)
+    response.raise_for_status()
+
+
+def bench(label, fn, rounds):
+    fn()   # warm up connections and caches
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    per_burst = (time.perf_counter() - started) / rounds * 1000
+    print(f"{label:<28} {per_burst:8.1f} ms / burst")
+    return per_burst
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare /detect/batch with single /detect calls")
+    parser.add_argument("images", help="Directory or glob of images making up one burst")
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument("--count", type=int, default=8, help="Images per burst")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    pattern = os.path.join(args.images, "*") if os.path.isdir(args.images) else args.images
+    paths = sorted(glob.glob(pattern))[:args.count]
+    if not paths:
+        raise SystemExit(f"No images found: {args.images}")
+
+    images = []
+    for path in paths:
+        with open(path, "rb") as f:
+            images.append((os.path.basename(path), f.read()))
+
+    session = requests.Session()
+    print(f"Burst of {len(images)} images, {args.rounds} rounds")
+    single = bench(f"{len(images)} x /detect", lambda: single_calls(args.url, images, session), args.rounds)
+    batch = bench("1 x /detect/batch", lambda: batch_call(args.url, images, session), args.rounds)
+    print(f"Speed-up: {single / batch:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
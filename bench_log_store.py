@@ -0,0 +1,71 @@
+"""
+Benchmark: detection log writes
+Sustained writes per second of the old rewrite-the-whole-JSON log
+versus the append-only SQLite store (single appends and batches)
+"""
+
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from src.log_store import DetectionLogStore
+
+
+def make_entry(i):
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'vehicle_type': ['tractor', 'truck', 'bullock_cart'][i % 3],
+        'sugarcane_detected': i % 2 == 0,
+        'number_plate_present': i % 4 != 0,
+        'number_plate_text': f"MH12AC{i % 10000:04d}",
+        'number_plate_color': ['White', 'Yellow'][i % 2]
+    }
+
+
+def legacy_json_append(entry, log_file):
+    """
+    What utils.log_detection used to do for every entry
+    """
+    logs = []
+    if os.path.exists(log_file):
+        with open(log_file, 'r') as f:
+            logs = json.load(f)
+    logs.append(entry)
+    with open(log_file, 'w') as f:
+        json.dump(logs, f, indent=2)
+
+
+def bench(label, n, write):
+    start = time.perf_counter()
+    write()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {n:>7} entries  {n / elapsed:>10.0f} writes/s")
+
+
+def main(n_legacy=2000, n_store=50000, batch=100):
+    with tempfile.TemporaryDirectory() as tmp:
+        print("\n" + "="*60)
+        print("Detection log write throughput")
+        print("="*60)
+
+        legacy = os.path.join(tmp, "detections.json")
+        bench("JSON rewrite (old)", n_legacy,
+              lambda: [legacy_json_append(make_entry(i), legacy) for i in range(n_legacy)])
+
+        store = DetectionLogStore(os.path.join(tmp, "single.db"))
+        bench("SQLite WAL, append()", n_store,
+              lambda: ([store.append(make_entry(i)) for i in range(n_store)], store.flush()))
+        store.close()
+
+        store = DetectionLogStore(os.path.join(tmp, "batched.db"))
+        entries = [make_entry(i) for i in range(n_store)]
+        bench(f"SQLite WAL, batches of {batch}", n_store,
+              lambda: [(store.append_many(entries[i:i + batch]), store.flush())
+                       for i in range(0, n_store, batch)])
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
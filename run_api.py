@@ -1,2 +1,31 @@
-from src.api import app
-app.run()
+import argparse
+
+from src.api import app, start_warmup, use_worker_pool
+from src.worker_pool import WorkerPool
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the detection API")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Number of inference worker processes (0 = in-process models)")
+    parser.add_argument("--cores-per-worker", type=int, default=None,
+                        help="CPU cores pinned to each worker (default: split evenly)")
+    parser.add_argument("--asgi", action="store_true",
+                        help="Serve the async (Starlette / uvicorn) app instead of Flask")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    args = parser.parse_args()
+
+    if args.workers > 0:
+        pool = WorkerPool(args.workers, cores_per_worker=args.cores_per_worker)
+        pool.start()
+        use_worker_pool(pool)
+    else:
+        start_warmup()
+
+    if args.asgi:
+        import uvicorn
+        from src.asgi_api import app as asgi_app
+
+        uvicorn.run(asgi_app, host=args.host, port=args.port)
+    else:
+        app.run(host=args.host, port=args.port)
@@ -0,0 +1,134 @@
+"""
+Vehicle / plate / load analysis
+Turns raw detections for one image into the /detect response
+"""
+
+from src import metrics
+from src.plate_color_detector import detect_color
+from src.ocr_processor import extract_plate_text, extract_text
+from src.vehicle_color_detector import detect_vehicle_color
+
+CLASS_MAP = {
+    0: "tractor",
+    1: "truck",
+    2: "bullock_cart",
+    3: "number_plate",
+    4: "sugarcane"
+}
+
+
+# -----------------------------
+# Helpers
+# -----------------------------
+def plate_inside_vehicle(plate_bbox, vehicle_bbox):
+    px1, py1, px2, py2 = plate_bbox
+    vx1, vy1, vx2, vy2 = vehicle_bbox
+    cx = (px1 + px2) // 2
+    cy = (py1 + py2) // 2
+    return vx1 <= cx <= vx2 and vy1 <= cy <= vy2
+
+
+def vehicle_score(v):
+    score = v["conf"]
+    if v["class"] == 1:   # boost truck
+        score += 0.15
+    return score
+
+
+# -----------------------------
+# Analysis
+# -----------------------------
+def analyze(img, detections, plate_only_ocr=True, crop_source=None):
+    """
+    plate_only_ocr runs whole-image OCR when no vehicle is found
+    (uploads that are just a plate photo); video processing turns it off.
+    crop_source(bbox) returns a higher-resolution plate crop when img was
+    decoded at reduced size.
+    """
+    vehicles, plates = [], []
+    sugarcane_boxes = []
+
+    metrics.count_detections(detections, CLASS_MAP)
+    for d in detections:
+        if d["class"] in [0, 1, 2]:
+            vehicles.append(d)
+        elif d["class"] == 3:
+            plates.append(d)
+        elif d["class"] == 4:
+            sugarcane_boxes.append(d["bbox"])
+
+    response = {
+        "vehicle_detected": False,
+        "vehicle_type": None,
+        "vehicle_color": None,
+        "load_status": "UNKNOWN",
+        "number_plate": None,
+        "plate_color": None
+    }
+
+    # -----------------------------
+    # VEHICLE FOUND
+    # -----------------------------
+    if vehicles:
+        vehicle = max(vehicles, key=vehicle_score)
+        vx1, vy1, vx2, vy2 = vehicle["bbox"]
+
+        w = vx2 - vx1
+        h = vy2 - vy1
+        aspect_ratio = w / h
+
+        vehicle_type = CLASS_MAP[vehicle["class"]]
+        if vehicle_type == "tractor" and aspect_ratio > 1.6:
+            vehicle_type = "truck"
+
+        response["vehicle_detected"] = True
+        response["vehicle_type"] = vehicle_type
+
+        vehicle_img = img[vy1:vy2, vx1:vx2]
+        with metrics.stage("vehicle_color"):
+            response["vehicle_color"] = detect_vehicle_color(vehicle_img, vehicle_type)
+
+        # -----------------------------
+        # LOAD STATUS (IoU BASED)
+        # -----------------------------
+        response["load_status"] = "EMPTY"
+        for sx1, sy1, sx2, sy2 in sugarcane_boxes:
+            cx = (sx1 + sx2) // 2
+            cy = (sy1 + sy2) // 2
+            if vx1 <= cx <= vx2 and vy1 <= cy <= vy2:
+                response["load_status"] = "SUGARCANE"
+                break
+
+        # -----------------------------
+        # NUMBER PLATE
+        # -----------------------------
+        for p in plates:
+            if plate_inside_vehicle(p["bbox"], vehicle["bbox"]):
+                px1, py1, px2, py2 = p["bbox"]
+                if crop_source is not None:
+                    plate_img = crop_source(p["bbox"])
+                else:
+                    plate_img = img[py1:py2, px1:px2]
+
+                with metrics.stage("plate_ocr"):
+                    text = extract_plate_text(plate_img)
+                metrics.count_ocr(text)
+                if text != "UNKNOWN":
+                    response["number_plate"] = text
+                    with metrics.stage("plate_color"):
+                        response["plate_color"] = detect_color(plate_img)
+                break
+
+    # -----------------------------
+    # PLATE ONLY IMAGE
+    # -----------------------------
+    elif plate_only_ocr:
+        with metrics.stage("image_ocr"):
+            plate_text = extract_text(img)
+        metrics.count_ocr(plate_text)
+        if plate_text != "UNKNOWN":
+            response["number_plate"] = plate_text
+            with metrics.stage("plate_color"):
+                response["plate_color"] = detect_color(img)
+
+    return response
@@ -1,133 +1,228 @@
-from flask import Flask, request, jsonify
+import os
+import threading
+import time
+import zipfile
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from flask import Flask, Response, g, request, jsonify, send_file
 from flask_cors import CORS
-import cv2
-import numpy as np
 
-from src.inference import detect
-from src.plate_color_detector import detect_color
-from src.ocr_processor import extract_text
-from src.vehicle_color_detector import detect_vehicle_color
+from src import inference, metrics, ocr_processor, profiling
+from src.analyzer import analyze
+from src.batch_detect import BATCH_MAX_BYTES, BatchTooLarge, detect_many, detect_many_in_pool, expand_uploads
+from src.batcher import MicroBatcher
+from src.image_io import MAX_UPLOAD_BYTES, MULTIPART_SLACK, ImageTooLarge, body_too_large, decode_upload
+from src.response_cache import RESPONSE_CACHE_DIR, RESPONSE_CACHE_MB, RESPONSE_CACHE_TTL, ResponseCache
+from src.inference import detect_batch
 
 app = Flask(__name__)
+# Hard cap for bodies without a Content-Length; routes check tighter limits first
+app.config["MAX_CONTENT_LENGTH"] = max(MAX_UPLOAD_BYTES, BATCH_MAX_BYTES) + MULTIPART_SLACK
 CORS(app)
 
-CLASS_MAP = {
-    0: "tractor",
-    1: "truck",
-    2: "bullock_cart",
-    3: "number_plate",
-    4: "sugarcane"
-}
+# Concurrent /detect requests are grouped into one YOLO pass
+DETECT_MAX_BATCH = int(os.environ.get("DETECT_MAX_BATCH", 8))
+DETECT_MAX_WAIT_MS = float(os.environ.get("DETECT_MAX_WAIT_MS", 5))
+
+detect_batcher = MicroBatcher(
+    detect_batch,
+    max_batch_size=DETECT_MAX_BATCH,
+    max_wait_ms=DETECT_MAX_WAIT_MS
+)
+
+# Retried uploads of the same bytes are answered from here
+response_cache = ResponseCache(
+    max_bytes=int(RESPONSE_CACHE_MB * 1024 * 1024),
+    ttl=RESPONSE_CACHE_TTL,
+    disk_dir=RESPONSE_CACHE_DIR
+)
+
+
+# -----------------------------
+# Warm-up / readiness
+# -----------------------------
+_ready = threading.Event()
+
+# Set by use_worker_pool(); /detect then runs in worker processes
+_worker_pool = None
+WORKER_TIMEOUT = float(os.environ.get("WORKER_TIMEOUT", 60))
+
+
+def warmup_models():
+    print("[INFO] Warming up models...")
+    inference.warmup()
+    ocr_processor.warmup()
+    _ready.set()
+    print("[INFO] Models ready")
+
+
+def start_warmup():
+    """
+    Warm up both models in the background; /ready reports 200 once done
+    """
+    thread = threading.Thread(target=warmup_models, name="model-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def use_worker_pool(pool):
+    """
+    Serve /detect from a started WorkerPool instead of in-process models
+    """
+    global _worker_pool
+    _worker_pool = pool
+
+
+def get_worker_pool():
+    return _worker_pool
+
+
+def is_ready():
+    return _worker_pool.is_ready() if _worker_pool is not None else _ready.is_set()
 
 
 # -----------------------------
-# Helpers
+# Metrics
 # -----------------------------
-def plate_inside_vehicle(plate_bbox, vehicle_bbox):
-    px1, py1, px2, py2 = plate_bbox
-    vx1, vy1, vx2, vy2 = vehicle_bbox
-    cx = (px1 + px2) // 2
-    cy = (py1 + py2) // 2
-    return vx1 <= cx <= vx2 and vy1 <= cy <= vy2
+@app.before_request
+def _start_timer():
+    g.started = time.perf_counter()
 
 
-def vehicle_score(v):
-    score = v["conf"]
-    if v["class"] == 1:   # boost truck
-        score += 0.15
-    return score
+@app.after_request
+def _record_request(response):
+    if "started" in g:
+        endpoint = request.url_rule.rule if request.url_rule is not None else "other"
+        metrics.observe_request(endpoint, response.status_code, time.perf_counter() - g.started)
+    return response
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics_api():
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
 
 
 # -----------------------------
 # API
 # -----------------------------
+@app.route("/ready", methods=["GET"])
+def ready_api():
+    if not is_ready():
+        return jsonify({"ready": False}), 503
+    return jsonify({"ready": True}), 200
+
+
+@app.route("/workers", methods=["GET"])
+def workers_api():
+    if _worker_pool is None:
+        return jsonify({"error": "Worker pool not enabled"}), 404
+    return jsonify(_worker_pool.status()), 200
+
+
 @app.route("/detect", methods=["POST"])
 def detect_api():
+    if body_too_large(request.content_length):
+        return jsonify({"error": "Upload too large"}), 413
+
+    profile = profiling.requested(request.headers, request.args)
+    if profile and not profiling.is_admin(request.headers):
+        return jsonify({"error": "Profiling requires an admin token"}), 403
+
     if "image" not in request.files:
         return jsonify({"error": "No image"}), 400
 
     img_bytes = request.files["image"].read()
-    img = cv2.imdecode(np.frombuffer(img_bytes, np.uint8), cv2.IMREAD_COLOR)
-
-    detections = detect(img)
-
-    vehicles, plates = [], []
-    sugarcane_boxes = []
-
-    for d in detections:
-        if d["class"] in [0, 1, 2]:
-            vehicles.append(d)
-        elif d["class"] == 3:
-            plates.append(d)
-        elif d["class"] == 4:
-            sugarcane_boxes.append(d["bbox"])
-
-    response = {
-        "vehicle_detected": False,
-        "vehicle_type": None,
-        "vehicle_color": None,
-        "load_status": "UNKNOWN",
-        "number_plate": None,
-        "plate_color": None
-    }
-
-    # -----------------------------
-    # VEHICLE FOUND
-    # -----------------------------
-    if vehicles:
-        vehicle = max(vehicles, key=vehicle_score)
-        vx1, vy1, vx2, vy2 = vehicle["bbox"]
-
-        w = vx2 - vx1
-        h = vy2 - vy1
-        aspect_ratio = w / h
-
-        vehicle_type = CLASS_MAP[vehicle["class"]]
-        if vehicle_type == "tractor" and aspect_ratio > 1.6:
-            vehicle_type = "truck"
-
-        response["vehicle_detected"] = True
-        response["vehicle_type"] = vehicle_type
-
-        vehicle_img = img[vy1:vy2, vx1:vx2]
-        response["vehicle_color"] = detect_vehicle_color(vehicle_img, vehicle_type)
-
-        # -----------------------------
-        # LOAD STATUS (IoU BASED)
-        # -----------------------------
-        response["load_status"] = "EMPTY"
-        for sx1, sy1, sx2, sy2 in sugarcane_boxes:
-            cx = (sx1 + sx2) // 2
-            cy = (sy1 + sy2) // 2
-            if vx1 <= cx <= vx2 and vy1 <= cy <= vy2:
-                response["load_status"] = "SUGARCANE"
-                break
-
-        # -----------------------------
-        # NUMBER PLATE
-        # -----------------------------
-        for p in plates:
-            if plate_inside_vehicle(p["bbox"], vehicle["bbox"]):
-                px1, py1, px2, py2 = p["bbox"]
-                plate_img = img[py1:py2, px1:px2]
-
-                text = extract_text(plate_img)
-                if text != "UNKNOWN":
-                    response["number_plate"] = text
-                    response["plate_color"] = detect_color(plate_img)
-                break
-
-    # -----------------------------
-    # PLATE ONLY IMAGE
-    # -----------------------------
+
+    if profile:
+        rid = profiling.request_id(request.headers)
+        (status, response), path, elapsed_ms = profiling.profile_call(rid, run_detect, img_bytes, True)
+        return jsonify(response), status, {
+            "X-Request-ID": rid,
+            "X-Profile": path,
+            "X-Profile-Time-Ms": f"{elapsed_ms:.1f}"
+        }
+
+    if not response_cache.enabled:
+        status, response = run_detect(img_bytes)
+        return jsonify(response), status
+
+    key = response_cache.key(img_bytes)
+    cached = response_cache.get(key)
+    if cached is not None:
+        status, body = cached
+        return Response(body, status=status, mimetype="application/json", headers={"X-Cache": "HIT"})
+
+    status, response = run_detect(img_bytes)
+    if status == 200:
+        # Same bytes a later HIT will return
+        body = response_cache.put(key, status, response)
+        return Response(body, status=status, mimetype="application/json", headers={"X-Cache": "MISS"})
+
+    return jsonify(response), status, {"X-Cache": "MISS"}
+
+
+def run_detect(img_bytes, inline=False):
+    """
+    Full /detect pipeline for one upload -> (status, response).
+    inline runs every stage on the calling thread, bypassing the worker
+    pool and the micro-batcher, so a profiler sees all of it.
+    """
+    if _worker_pool is not None and not inline:
+        try:
+            return _worker_pool.submit(img_bytes).result(timeout=WORKER_TIMEOUT)
+        except FutureTimeoutError:
+            return 504, {"error": "Inference timed out"}
+
+    try:
+        upload = decode_upload(img_bytes)
+    except ImageTooLarge as e:
+        return 413, {"error": str(e)}
+    if upload is None:
+        # A bad upload must not fail the other requests in its batch
+        return 400, {"error": "Invalid image"}
+
+    if inline:
+        detections = inference.detect(upload.image)
+    else:
+        detections = detect_batcher.submit(upload.image)
+    return 200, analyze(upload.image, detections, crop_source=upload.crop)
+
+
+@app.route("/profiles/<request_id>", methods=["GET"])
+def profile_api(request_id):
+    if not profiling.is_admin(request.headers):
+        return jsonify({"error": "Profiling requires an admin token"}), 403
+
+    path = profiling.profile_path(request_id)
+    if path is None or not os.path.exists(path):
+        return jsonify({"error": "Profile not found"}), 404
+    return send_file(os.path.abspath(path), mimetype="application/octet-stream", as_attachment=True)
+
+
+@app.route("/detect/batch", methods=["POST"])
+def detect_batch_api():
+    if body_too_large(request.content_length, BATCH_MAX_BYTES):
+        return jsonify({"error": "Batch too large"}), 413
+
+    files = request.files.getlist("images") + request.files.getlist("image")
+    if not files:
+        return jsonify({"error": "No images"}), 400
+
+    try:
+        uploads = expand_uploads([(f.filename, f.read()) for f in files])
+    except BatchTooLarge as e:
+        return jsonify({"error": str(e)}), 413
+    except zipfile.BadZipFile:
+        return jsonify({"error": "Invalid zip archive"}), 400
+
+    if _worker_pool is not None:
+        results = detect_many_in_pool(uploads, _worker_pool, timeout=WORKER_TIMEOUT)
     else:
-        plate_text = extract_text(img)
-        if plate_text != "UNKNOWN":
-            response["number_plate"] = plate_text
-            response["plate_color"] = detect_color(img)
+        results = detect_many(uploads, detect_batcher)
 
-    return jsonify(response), 200
+    return jsonify({"count": len(results), "results": results}), 200
 
 
 if __name__ == "__main__":
+    start_warmup()
     app.run(host="127.0.0.1", port=5000, debug=False)
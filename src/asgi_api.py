@@ -0,0 +1,229 @@
+"""
+Async (ASGI) detection API
+Same routes and responses as src/api.py, served by Starlette. Uploads are
+awaited on the event loop; decode / detection / OCR run off the loop in a
+thread pool (or in the worker processes when a WorkerPool is enabled), so
+slow clients never hold an inference thread.
+"""
+
+import asyncio
+import os
+import time
+import zipfile
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import FileResponse, JSONResponse, PlainTextResponse, Response
+from starlette.routing import Route
+
+from src import api, metrics, profiling
+from src.analyzer import analyze
+from src.batch_detect import BATCH_MAX_BYTES, BatchTooLarge, detect_many, detect_many_in_pool, expand_uploads
+from src.image_io import ImageTooLarge, body_too_large, decode_upload
+
+# Threads for CPU-bound decode / post-processing / OCR
+ASGI_THREADS = int(os.environ.get("ASGI_THREADS", os.cpu_count() or 4))
+
+executor = ThreadPoolExecutor(max_workers=ASGI_THREADS, thread_name_prefix="asgi-cpu")
+
+
+async def run_in_executor(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+
+
+# -----------------------------
+# Metrics
+# -----------------------------
+class MetricsMiddleware:
+    """
+    Plain ASGI middleware recording latency and status per route
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            endpoint = scope["path"] if scope["path"] in ROUTE_PATHS else "other"
+            metrics.observe_request(endpoint, status, time.perf_counter() - started)
+
+
+async def metrics_api(request):
+    return PlainTextResponse(metrics.render(), headers={"Content-Type": metrics.CONTENT_TYPE})
+
+
+# -----------------------------
+# API
+# -----------------------------
+async def ready_api(request):
+    if not api.is_ready():
+        return JSONResponse({"ready": False}, status_code=503)
+    return JSONResponse({"ready": True}, status_code=200)
+
+
+async def workers_api(request):
+    pool = api.get_worker_pool()
+    if pool is None:
+        return JSONResponse({"error": "Worker pool not enabled"}, status_code=404)
+    return JSONResponse(pool.status(), status_code=200)
+
+
+async def detect_api(request):
+    if body_too_large(request.headers.get("content-length")):
+        return JSONResponse({"error": "Upload too large"}, status_code=413)
+
+    profile = profiling.requested(request.headers, request.query_params)
+    if profile and not profiling.is_admin(request.headers):
+        return JSONResponse({"error": "Profiling requires an admin token"}, status_code=403)
+
+    form = await request.form()
+    upload = form.get("image")
+    if upload is None or isinstance(upload, str):
+        return JSONResponse({"error": "No image"}, status_code=400)
+
+    img_bytes = await upload.read()
+
+    if profile:
+        # Runs the whole pipeline on one executor thread so cProfile sees every stage
+        rid = profiling.request_id(request.headers)
+        (status, response), path, elapsed_ms = await run_in_executor(
+            profiling.profile_call, rid, api.run_detect, img_bytes, True
+        )
+        return JSONResponse(response, status_code=status, headers={
+            "X-Request-ID": rid,
+            "X-Profile": path,
+            "X-Profile-Time-Ms": f"{elapsed_ms:.1f}"
+        })
+
+    cache = api.response_cache
+    if not cache.enabled:
+        status, response = await run_detect(img_bytes)
+        return JSONResponse(response, status_code=status)
+
+    # Hashing and the disk tier stay off the loop
+    key = await run_in_executor(cache.key, img_bytes)
+    cached = await run_in_executor(cache.get, key)
+    if cached is not None:
+        status, body = cached
+        return Response(body, status_code=status, media_type="application/json", headers={"X-Cache": "HIT"})
+
+    status, response = await run_detect(img_bytes)
+    if status == 200:
+        # Same bytes a later HIT will return
+        body = await run_in_executor(cache.put, key, status, response)
+        return Response(body, status_code=status, media_type="application/json", headers={"X-Cache": "MISS"})
+
+    return JSONResponse(response, status_code=status, headers={"X-Cache": "MISS"})
+
+
+async def run_detect(img_bytes):
+    """
+    Full /detect pipeline for one upload -> (status, response)
+    """
+    pool = api.get_worker_pool()
+    if pool is not None:
+        try:
+            # shield: a timeout must not cancel the pool's future under its listener
+            return await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(pool.submit(img_bytes))), timeout=api.WORKER_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            return 504, {"error": "Inference timed out"}
+
+    try:
+        upload = await run_in_executor(decode_upload, img_bytes)
+    except ImageTooLarge as e:
+        return 413, {"error": str(e)}
+    if upload is None:
+        return 400, {"error": "Invalid image"}
+
+    # Shares the micro-batcher with the Flask app; awaiting keeps the loop free
+    detections = await asyncio.wrap_future(api.detect_batcher.submit_async(upload.image))
+    response = await run_in_executor(lambda: analyze(upload.image, detections, crop_source=upload.crop))
+
+    return 200, response
+
+
+async def profile_api(request):
+    if not profiling.is_admin(request.headers):
+        return JSONResponse({"error": "Profiling requires an admin token"}, status_code=403)
+
+    path = profiling.profile_path(request.path_params["request_id"])
+    if path is None or not os.path.exists(path):
+        return JSONResponse({"error": "Profile not found"}, status_code=404)
+    return FileResponse(path, media_type="application/octet-stream", filename=os.path.basename(path))
+
+
+async def detect_batch_api(request):
+    if body_too_large(request.headers.get("content-length"), BATCH_MAX_BYTES):
+        return JSONResponse({"error": "Batch too large"}, status_code=413)
+
+    form = await request.form()
+    files = [f for f in form.getlist("images") + form.getlist("image") if not isinstance(f, str)]
+    if not files:
+        return JSONResponse({"error": "No images"}, status_code=400)
+
+    try:
+        uploads = expand_uploads([(f.filename, await f.read()) for f in files])
+    except BatchTooLarge as e:
+        return JSONResponse({"error": str(e)}, status_code=413)
+    except zipfile.BadZipFile:
+        return JSONResponse({"error": "Invalid zip archive"}, status_code=400)
+
+    pool = api.get_worker_pool()
+    if pool is not None:
+        results = await run_in_executor(detect_many_in_pool, uploads, pool, api.WORKER_TIMEOUT)
+    else:
+        results = await run_in_executor(detect_many, uploads, api.detect_batcher)
+
+    return JSONResponse({"count": len(results), "results": results}, status_code=200)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    executor.shutdown(wait=False)
+
+
+app = Starlette(
+    routes=[
+        Route("/ready", ready_api, methods=["GET"]),
+        Route("/workers", workers_api, methods=["GET"]),
+        Route("/detect", detect_api, methods=["POST"]),
+        Route("/detect/batch", detect_batch_api, methods=["POST"]),
+        Route("/metrics", metrics_api, methods=["GET"]),
+        Route("/profiles/{request_id}", profile_api, methods=["GET"])
+    ],
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"]),
+        Middleware(MetricsMiddleware)
+    ],
+    lifespan=lifespan
+)
+
+ROUTE_PATHS = {route.path for route in app.routes}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    api.start_warmup()
+    uvicorn.run(app, host="127.0.0.1", port=5000)
@@ -0,0 +1,156 @@
+"""
+Asynchronous evidence writer
+Background service that JPEG-encodes screenshots and appends detection
+records off the frame loop, with a bounded queue and a drop policy
+"""
+
+import itertools
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+import cv2
+
+from src.utils import log_detections
+
+SCREENSHOT_DIR = "screenshots"
+
+
+class AsyncEvidenceWriter:
+    """
+    submit_screenshot() / submit_record() never block the caller.
+
+    When the queue is full, drop_policy "newest" rejects the new item and
+    "oldest" discards the oldest queued item to make room. Records are
+    flushed to record_sink in batches of up to batch_size, or after
+    flush_interval seconds.
+    """
+
+    def __init__(self, record_sink=log_detections, screenshot_dir=SCREENSHOT_DIR,
+                 queue_size=256, batch_size=32, flush_interval=1.0,
+                 drop_policy="newest", jpeg_quality=90):
+        if drop_policy not in ("newest", "oldest"):
+            raise ValueError("drop_policy must be 'newest' or 'oldest'")
+
+        self.record_sink = record_sink
+        self.screenshot_dir = screenshot_dir
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.drop_policy = drop_policy
+        self.jpeg_quality = jpeg_quality
+
+        self.counters = {"queued": 0, "written": 0, "dropped": 0, "errors": 0}
+        self._screenshot_ids = itertools.count()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="evidence-writer", daemon=True)
+        self._thread.start()
+
+    # -----------------------------
+    # Producer side
+    # -----------------------------
+    def submit_screenshot(self, frame, path=None, tag=None):
+        """
+        Queue a frame to be saved as
+        screenshots/frame_<epoch ms>_<seq>[_<tag>].jpg (unique per writer).
+        The frame is copied, so the caller may keep drawing on it.
+        Returns the path, or None if the screenshot was dropped.
+        """
+        if path is None:
+            name = f"frame_{int(time.time() * 1000)}_{next(self._screenshot_ids):06d}"
+            if tag is not None:
+                name += f"_{tag}"
+            path = os.path.join(self.screenshot_dir, name + ".jpg")
+        return path if self._submit(("screenshot", path, frame.copy())) else None
+
+    def submit_record(self, detection_result):
+        record = dict(detection_result)
+        record.setdefault("timestamp", datetime.now().isoformat())
+        return self._submit(("record", record))
+
+    def _submit(self, item):
+        with self._lock:
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                if self.drop_policy == "newest":
+                    self.counters["dropped"] += 1
+                    return False
+                try:
+                    self._queue.get_nowait()
+                    self.counters["dropped"] += 1
+                except queue.Empty:
+                    pass
+                self._queue.put_nowait(item)
+            self.counters["queued"] += 1
+            return True
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, pending=self._queue.qsize())
+
+    def stop(self, timeout=10):
+        """
+        Flush everything queued so far and stop the writer thread
+        """
+        self._stop_event.set()
+        self._thread.join(timeout=timeout)
+
+    # -----------------------------
+    # Writer thread
+    # -----------------------------
+    def _count(self, key, n=1):
+        with self._lock:
+            self.counters[key] += n
+
+    def _write_screenshot(self, path, frame):
+        try:
+            ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if not ok:
+                raise RuntimeError("JPEG encoding failed")
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(buf.tobytes())
+            self._count("written")
+        except Exception as e:
+            print(f"⚠ Screenshot not saved ({path}): {e}")
+            self._count("errors")
+
+    def _flush(self, records):
+        if not records:
+            return
+        try:
+            self.record_sink(records)
+            self._count("written", len(records))
+        except Exception as e:
+            print(f"⚠ {len(records)} detection records not saved: {e}")
+            self._count("errors", len(records))
+        records.clear()
+
+    def _run(self):
+        records = []
+        last_flush = time.monotonic()
+
+        while True:
+            try:
+                item = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                item = None
+
+            if item is not None:
+                if item[0] == "screenshot":
+                    self._write_screenshot(item[1], item[2])
+                else:
+                    records.append(item[1])
+
+            now = time.monotonic()
+            if len(records) >= self.batch_size or (records and now - last_flush >= self.flush_interval):
+                self._flush(records)
+                last_flush = now
+
+            if item is None and self._stop_event.is_set() and self._queue.empty():
+                self._flush(records)
+                return
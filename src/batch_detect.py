@@ -0,0 +1,119 @@
+"""
+Multi-image detection
+Backs POST /detect/batch: several uploads (or a zip of images) are decoded
+in parallel, detected together and analyzed into one /detect-style result
+per image
+"""
+
+import io
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from src.analyzer import analyze
+from src.image_io import ImageTooLarge, decode_upload
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+# Kiosks send 4-10 photos per vehicle; anything far above that is a mistake
+BATCH_MAX_IMAGES = int(os.environ.get("DETECT_BATCH_MAX_IMAGES", 32))
+BATCH_MAX_BYTES = int(os.environ.get("DETECT_BATCH_MAX_BYTES", 200 * 1024 * 1024))
+
+decode_pool = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("DETECT_BATCH_THREADS", min(8, os.cpu_count() or 1))),
+    thread_name_prefix="batch-decode"
+)
+
+
+class BatchTooLarge(ValueError):
+    pass
+
+
+def _is_zip(name, data):
+    return (name or "").lower().endswith(".zip") or data[:4] == b"PK\x03\x04"
+
+
+def expand_uploads(uploads):
+    """
+    [(filename, bytes)] -> [(filename, bytes)] with zip archives replaced
+    by the images inside them, in archive order
+    """
+    images, total = [], 0
+
+    def add(name, size, read):
+        nonlocal total
+        total += size
+        if total > BATCH_MAX_BYTES or len(images) >= BATCH_MAX_IMAGES:
+            raise BatchTooLarge(f"Batch exceeds {BATCH_MAX_IMAGES} images / {BATCH_MAX_BYTES} bytes")
+        images.append((name, read()))
+
+    for name, data in uploads:
+        if not _is_zip(name, data):
+            add(name, len(data), lambda: data)
+            continue
+
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or not info.filename.lower().endswith(IMAGE_EXTENSIONS):
+                    continue
+                # Sizes come from the zip directory, so a zip bomb is never inflated
+                add(info.filename, info.file_size, lambda: archive.read(info))
+
+    return images
+
+
+def _result(name, status, body):
+    return {"filename": name, "status": status, "result": body}
+
+
+def _decode(data):
+    try:
+        return decode_upload(data)
+    except ImageTooLarge as e:
+        return e
+
+
+def detect_many(uploads, batcher, timeout=None):
+    """
+    Decode in parallel, submit every image to the micro-batcher at once
+    (so they share forward passes) and analyze each result.
+    Returns one {"filename", "status", "result"} per image, in input order.
+    """
+    names = [name for name, _ in uploads]
+    decoded = list(decode_pool.map(_decode, [data for _, data in uploads]))
+
+    futures = [
+        batcher.submit_async(d.image) if d is not None and not isinstance(d, ImageTooLarge) else None
+        for d in decoded
+    ]
+
+    def finish(i):
+        upload = decoded[i]
+        if upload is None:
+            return _result(names[i], 400, {"error": "Invalid image"})
+        if isinstance(upload, ImageTooLarge):
+            return _result(names[i], 413, {"error": str(upload)})
+        try:
+            detections = futures[i].result(timeout=timeout)
+        except FutureTimeoutError:
+            return _result(names[i], 504, {"error": "Inference timed out"})
+        return _result(names[i], 200, analyze(upload.image, detections, crop_source=upload.crop))
+
+    return list(decode_pool.map(finish, range(len(uploads))))
+
+
+def detect_many_in_pool(uploads, pool, timeout=None):
+    """
+    Same as detect_many, with each image handled by a WorkerPool process
+    """
+    futures = [pool.submit(data) for _, data in uploads]
+
+    results = []
+    for (name, _), future in zip(uploads, futures):
+        try:
+            status, body = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            status, body = 504, {"error": "Inference timed out"}
+        results.append(_result(name, status, body))
+    return results
@@ -2,11 +2,21 @@ import os
 os.environ["ULTRALYTICS_DISABLE_CV2_IMSHOW"] = "1"
 
 import cv2
+import threading
 import time
 
+from src import metrics
+from src.analyzer import CLASS_MAP
+from src.async_writer import AsyncEvidenceWriter
+from src.crop_cache import cache_stats, cached_crop, hue_signature, is_miss
+from src.frame_pipeline import CaptureThread, DropOldestQueue, LatencyStats, StageStats
+from src.frame_scheduler import AdaptiveScheduler
 from src.inference import detect
-from src.ocr_processor import extract_text
+from src.motion_detector import MotionGate
+from src.ocr_processor import PLATE_OCR_MODE, extract_plate_text, extract_plate_texts
 from src.plate_color_detector import detect_color
+from src.shm_ring import FrameOverrun, SharedMemoryCapture
+from src.tracker import IoUTracker, crop_quality
 from src.vehicle_color_detector import detect_vehicle_color
 
 
@@ -18,6 +28,10 @@ CLASS_NAMES = {
     4: "SUGARCANE"
 }
 
+FRAME_SIZE = (960, 540)
+STATS_INTERVAL = 5.0   # seconds between console stats reports
+CROP_CACHE_TTL = 30.0  # seconds a cached OCR / color result stays valid
+
 
 def plate_inside_vehicle(plate_bbox, vehicle_bbox):
     px1, py1, px2, py2 = plate_bbox
@@ -27,88 +41,405 @@ def plate_inside_vehicle(plate_bbox, vehicle_bbox):
     return vx1 <= cx <= vx2 and vy1 <= cy <= vy2
 
 
-def vehicle_score(v):
-    score = v["conf"]
-    if v["class"] == 1:  # boost truck
-        score += 0.15
-    return score
+def _crop(frame, bbox):
+    x1, y1, x2, y2 = bbox
+    return frame[max(y1, 0):max(y2, 0), max(x1, 0):max(x2, 0)]
 
 
-def run_camera(source=0):
-    print("[INFO] Starting camera...")
+class TrackingAnalyzer:
+    """
+    Tracks every vehicle and plate across frames.
+    Color and OCR run only for new tracks or when a track's crop quality
+    improves; plate reads are voted across frames per track.
+    With a motion gate, unchanged frames reuse the previous overlays
+    without running the detector. With a scheduler, frame skip, imgsz and
+    OCR follow its decisions.
+    on_event(frame, result) is called when a vehicle track is first seen
+    and again when its plate reading, plate color or sugarcane load first
+    becomes known or changes.
+    """
 
-    cap = cv2.VideoCapture(source)
-    time.sleep(2)
+    def __init__(self, motion_gate=None, scheduler=None, on_event=None):
+        self.vehicles = IoUTracker()
+        self.plates = IoUTracker()
+        self.motion_gate = motion_gate
+        self.scheduler = scheduler
+        self.on_event = on_event
+        self.frames = 0
+        self.ocr_calls = 0
+        self._last_overlays = []
 
-    if not cap.isOpened():
-        raise RuntimeError("❌ Camera not opened")
+        # Crops barely change while a vehicle waits at the weighbridge, so
+        # repeated frames reuse earlier results. Caches belong to this camera
+        # and are scoped by track id, so one vehicle's result is never
+        # handed to another; color caches also key on a hue signature.
+        self.cached_plate_text = cached_crop(
+            "plate_text", max_distance=0, hash_size=16, ttl=CROP_CACHE_TTL
+        )(extract_plate_text)
+        self.cached_plate_color = cached_crop(
+            "plate_color", max_distance=4, ttl=CROP_CACHE_TTL, signature=hue_signature
+        )(detect_color)
+        self.cached_vehicle_color = cached_crop(
+            "vehicle_color", max_distance=4, ttl=CROP_CACHE_TTL, signature=hue_signature
+        )(detect_vehicle_color)
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("⚠️ Frame not received")
-            break
+    def _refresh_plates(self, frame, plate_tracks):
+        if self.scheduler is not None and not self.scheduler.run_ocr:
+            return
+
+        due = []
+        for track in plate_tracks:
+            crop = _crop(frame, track.bbox)
+            if track.needs_refresh(crop_quality(crop, track.conf)):
+                due.append((track, crop))
+        if not due:
+            return
+
+        self.ocr_calls += len(due)
+        with metrics.stage("plate_ocr"):
+            texts = self._read_plates(due)
+
+        for (track, crop), text in zip(due, texts):
+            metrics.count_ocr(text)
+            track.vote_plate(text)
+            with metrics.stage("plate_color"):
+                track.attributes["color"] = self.cached_plate_color(crop, scope=track.id)
+
+    def _read_plates(self, due):
+        if PLATE_OCR_MODE != "recognize":
+            return [self.cached_plate_text(crop, scope=track.id) for track, crop in due]
+
+        # One recognizer call for every plate of this frame not in the cache
+        cache = self.cached_plate_text.cache
+        keys = [cache.key(crop, scope=track.id) if crop.size else None for track, crop in due]
+        texts = [cache.get(key) if key is not None else None for key in keys]
+
+        missing = [i for i, text in enumerate(texts) if text is None or is_miss(text)]
+        if missing:
+            for i, text in zip(missing, extract_plate_texts([due[i][1] for i in missing])):
+                texts[i] = text
+                if keys[i] is not None:
+                    cache.put(keys[i], text)
+        return texts
+
+    def _refresh_vehicle(self, frame, track):
+        crop = _crop(frame, track.bbox)
+        if not track.needs_refresh(crop_quality(crop, track.conf)):
+            return
+
+        vehicle_type = CLASS_NAMES.get(track.cls, "UNKNOWN")
+        with metrics.stage("vehicle_color"):
+            track.attributes["color"] = self.cached_vehicle_color(crop, vehicle_type.lower(), scope=track.id)
+
+    def _event(self, track):
+        return {
+            "track_id": track.id,
+            "vehicle_type": CLASS_NAMES.get(track.cls, "UNKNOWN").lower(),
+            "vehicle_color": track.attributes.get("color"),
+            "sugarcane_detected": track.attributes.get("sugarcane", False),
+            "number_plate_present": track.plate_text is not None,
+            "number_plate_text": track.plate_text or "N/A",
+            "number_plate_color": track.attributes.get("plate_color") or "N/A"
+        }
+
+    def wants_detection(self, frame):
+        """
+        Counts the frame and asks the motion gate whether to run the detector
+        """
+        self.frames += 1
+        wanted = self.motion_gate is None or self.motion_gate.check(frame)
+        metrics.frames_total.inc("detected" if wanted else "skipped")
+        return wanted
 
-        frame = cv2.resize(frame, (960, 540))
-        detections = detect(frame)
+    @property
+    def last_overlays(self):
+        return self._last_overlays
 
-        vehicles = []
-        plates = []
+    def __call__(self, frame, snapshot=None):
+        """
+        Returns a list of (bbox, label) overlays to draw.
+        snapshot(frame), if given, runs between detection and the tracker
+        update and returns the frame to track and crop from; an exception
+        there drops the frame before any track is touched.
+        """
+        if self.scheduler is not None and not self.scheduler.admit():
+            return self._last_overlays
 
-        for d in detections:
-            if d["class"] in [0, 1, 2]:
-                vehicles.append(d)
-            elif d["class"] == 3:
-                plates.append(d)
+        if not self.wants_detection(frame):
+            return self._last_overlays
 
-        if vehicles:
-            vehicle = max(vehicles, key=vehicle_score)
-            vx1, vy1, vx2, vy2 = vehicle["bbox"]
+        started = time.perf_counter()
+        if self.scheduler is None:
+            detections = detect(frame)
+        else:
+            detections = detect(frame, imgsz=self.scheduler.imgsz)
 
-            vehicle_type = CLASS_NAMES.get(vehicle["class"], "UNKNOWN")
+        if snapshot is not None:
+            frame = snapshot(frame)
+        overlays = self.process(frame, detections)
 
-            # 🔹 Vehicle color
-            vehicle_img = frame[vy1:vy2, vx1:vx2]
-            vehicle_color = detect_vehicle_color(vehicle_img, vehicle_type.lower())
+        if self.scheduler is not None:
+            self.scheduler.record((time.perf_counter() - started) * 1000)
+        return overlays
 
-            # 🔹 Plate detection
-            plate_text = "NOT FOUND"
-            plate_color = ""
+    def process(self, frame, detections):
+        """
+        Update tracks from detections computed elsewhere (e.g. a shared batch)
+        """
+        metrics.count_detections(detections, CLASS_MAP)
+        vehicle_tracks = self.vehicles.update([d for d in detections if d["class"] in [0, 1, 2]])
+        plate_tracks = self.plates.update([d for d in detections if d["class"] == 3])
+        sugarcane_boxes = [d["bbox"] for d in detections if d["class"] == 4]
 
-            for p in plates:
-                if plate_inside_vehicle(p["bbox"], vehicle["bbox"]):
-                    px1, py1, px2, py2 = p["bbox"]
-                    plate_img = frame[py1:py2, px1:px2]
-                    if plate_img.size > 0:
-                        plate_text = extract_text(plate_img)
-                        plate_color = detect_color(plate_img)
+        self._refresh_plates(frame, plate_tracks)
+
+        overlays = []
+        for track in vehicle_tracks:
+            self._refresh_vehicle(frame, track)
+
+            vehicle_type = CLASS_NAMES.get(track.cls, "UNKNOWN")
+            label = f"#{track.id} {vehicle_type} | {track.attributes.get('color', 'UNKNOWN')}"
+
+            for plate in plate_tracks:
+                if plate_inside_vehicle(plate.bbox, track.bbox):
+                    # Keep the plate voted for this vehicle even if the plate track restarts
+                    if plate.plate_text:
+                        track.plate_votes[plate.plate_text] += 1
+                    track.attributes["plate_color"] = plate.attributes.get("color", "")
                     break
 
-            # 🔹 LABEL (exactly like your screenshot)
-            label = f"{vehicle_type} | {vehicle_color}"
-            if plate_text != "UNKNOWN":
-                label += f" | {plate_text}"
-            if plate_color:
-                label += f" | {plate_color}"
-
-            # 🔹 DRAW BOX
-            cv2.rectangle(frame, (vx1, vy1), (vx2, vy2), (0, 255, 0), 2)
-
-            # 🔹 DRAW TEXT
-            cv2.putText(
-                frame,
-                label,
-                (vx1, max(30, vy1 - 10)),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.7,
-                (0, 255, 0),
-                2
+            if any(plate_inside_vehicle(b, track.bbox) for b in sugarcane_boxes):
+                track.attributes["sugarcane"] = True
+
+            if track.plate_text:
+                label += f" | {track.plate_text}"
+            if track.attributes.get("plate_color"):
+                label += f" | {track.attributes['plate_color']}"
+
+            overlays.append((track.bbox, label))
+
+            reported = (
+                track.plate_text,
+                track.attributes.get("sugarcane", False),
+                track.attributes.get("plate_color")
             )
+            if self.on_event is not None and track.attributes.get("reported") != reported:
+                track.attributes["reported"] = reported
+                self.on_event(frame, self._event(track))
+
+        self._last_overlays = overlays
+        return overlays
+
+
+def draw_overlays(frame, overlays):
+    for (x1, y1, x2, y2), label in overlays:
+        # 🔹 DRAW BOX
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+
+        # 🔹 DRAW TEXT
+        cv2.putText(
+            frame,
+            label,
+            (x1, max(30, y1 - 10)),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.7,
+            (0, 255, 0),
+            2
+        )
+
+
+class InferenceStage(threading.Thread):
+    """
+    Pulls the newest captured frame, runs detection + OCR and pushes
+    (captured_at, frame, overlays) to the render stage.
+    check(seq) is needed when the input frames are views into a
+    shared-memory ring: each frame is copied after detection and check
+    raises FrameOverrun if the slot was overwritten meanwhile, in which
+    case the frame is dropped before the trackers see it.
+    An exception ends the stage and is kept in ``error`` for the caller.
+    """
+
+    def __init__(self, in_queue, out_queue, analyze, check=None):
+        super().__init__(name="inference", daemon=True)
+        self.inp = in_queue
+        self.out = out_queue
+        self.analyze = analyze
+        self.check = check
+        self.stats = StageStats("inference")
+        self.error = None
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        try:
+            self._loop()
+        except Exception as e:
+            # e.g. a missing model file, first loaded on this thread
+            self.error = e
+            print(f"[ERROR] Inference stage failed: {e!r}")
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            item = self.inp.get(timeout=0.1)
+            if item is None:
+                continue
+
+            seq, captured_at, frame = item
+            try:
+                if self.check is None:
+                    overlays = self.analyze(frame)
+                else:
+                    frame, overlays = self._analyze_view(seq, frame)
+            except FrameOverrun:
+                # Counted by the capture; the tracks never saw this frame
+                continue
+
+            self.out.put((captured_at, frame, overlays))
+            self.stats.tick()
+
+    def _analyze_view(self, seq, view):
+        frame = None
+
+        def snapshot(v):
+            nonlocal frame
+            frame = v.copy()
+            self.check(seq)
+            return frame
+
+        overlays = self.analyze(view, snapshot=snapshot)
+        if frame is None:
+            # Detector skipped (motion gate / scheduler); still needs a copy to render
+            snapshot(view)
+        return frame, overlays
+
+
+def format_stats(stages, latency):
+    fps = " | ".join(f"{s.name} {s.fps:.1f} fps" for s in stages)
+    lat = latency.summary()
+    return f"{fps} | e2e {lat['mean_ms']:.0f} ms (p95 {lat['p95_ms']:.0f} ms)"
+
+
+def run_camera(source=0, motion_gate=True, motion_sensitivity=25,
+               motion_min_ratio=0.005, motion_refresh=5.0,
+               target_fps=None, target_latency_ms=None, shared_memory=False,
+               save_evidence=True, metrics_port=None):
+    """
+    motion_gate skips the detector on static frames; motion_sensitivity
+    and motion_min_ratio tune what counts as a change and motion_refresh
+    forces a detector run every N seconds regardless.
+    target_fps / target_latency_ms enable the adaptive scheduler.
+    shared_memory runs capture in its own process and passes frames
+    through a shared-memory ring instead of a thread queue.
+    save_evidence saves a screenshot and a log record for every new
+    vehicle / plate reading through the background evidence writer.
+    metrics_port serves Prometheus metrics on http://127.0.0.1:<port>/metrics.
+    """
+    print("[INFO] Starting camera...")
+
+    if metrics_port:
+        metrics.start_metrics_server(metrics_port)
+        print(f"[INFO] Metrics on http://127.0.0.1:{metrics_port}/metrics")
+
+    # capture -> inference -> render, each hop a bounded drop-oldest queue
+    if shared_memory:
+        capture = SharedMemoryCapture(source, shape=(FRAME_SIZE[1], FRAME_SIZE[0], 3))
+    else:
+        capture = CaptureThread(source, size=FRAME_SIZE, out_queue=DropOldestQueue(maxsize=1))
+    results = DropOldestQueue(maxsize=2)
+    gate = None
+    if motion_gate:
+        gate = MotionGate(
+            sensitivity=motion_sensitivity,
+            min_changed_ratio=motion_min_ratio,
+            refresh_interval=motion_refresh
+        )
+
+    scheduler = None
+    if target_fps or target_latency_ms:
+        scheduler = AdaptiveScheduler(target_fps=target_fps, target_latency_ms=target_latency_ms)
+
+    writer = None
+    on_event = None
+    if save_evidence:
+        writer = AsyncEvidenceWriter()
+
+        def on_event(frame, result):
+            path = writer.submit_screenshot(frame, tag=f"track{result['track_id']}")
+            writer.submit_record(dict(result, screenshot=path))
+
+    analyzer = TrackingAnalyzer(motion_gate=gate, scheduler=scheduler, on_event=on_event)
+    inference = InferenceStage(capture.out, results, analyzer,
+                               check=capture.check if shared_memory else None)
+
+    time.sleep(2)
+
+    if not capture.is_opened():
+        raise RuntimeError("❌ Camera not opened")
+
+    capture.start()
+    inference.start()
+
+    render_stats = StageStats("render")
+    latency = LatencyStats()
+    last_report = time.perf_counter()
+
+    while True:
+        item = results.get(timeout=0.1)
+        if item is None:
+            if not inference.is_alive():
+                break
+            if capture.is_done() and results.qsize() == 0:
+                break
+            # Keep the window responsive (and ESC working) while waiting
+            if cv2.waitKey(1) & 0xFF == 27:
+                break
+            continue
+
+        captured_at, frame, overlays = item
+        draw_overlays(frame, overlays)
+
+        stats_line = format_stats([capture.stats, inference.stats, render_stats], latency)
+        cv2.putText(frame, stats_line, (10, frame.shape[0] - 12),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 255), 1)
+        if scheduler is not None:
+            stats_line += f" | {scheduler.describe()}"
+            cv2.putText(frame, scheduler.describe(), (10, frame.shape[0] - 32),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 255), 1)
 
         cv2.imshow("Agricultural Vehicle Monitoring", frame)
+        render_stats.tick()
+        latency.record(captured_at)
+        metrics.stage_latency.observe(time.perf_counter() - captured_at, "frame_e2e")
+
+        if time.perf_counter() - last_report >= STATS_INTERVAL:
+            print(f"[STATS] {stats_line}")
+            last_report = time.perf_counter()
 
         if cv2.waitKey(1) & 0xFF == 27:
             break
 
-    cap.release()
+    capture.stop()
+    inference.stop()
+    capture.join(timeout=2)
+    inference.join(timeout=5)
     cv2.destroyAllWindows()
+    if writer is not None:
+        writer.stop()
+
+    print(f"[STATS] {format_stats([capture.stats, inference.stats, render_stats], latency)}")
+    if shared_memory:
+        print(f"[INFO] Shared-memory ring overruns: {capture.overruns}")
+        capture.close()
+    print(f"[INFO] OCR ran {analyzer.ocr_calls} times over {analyzer.frames} frames")
+    if writer is not None:
+        w = writer.stats()
+        print(f"[INFO] Evidence writer: {w['queued']} queued, {w['written']} written, {w['dropped']} dropped")
+    if gate is not None:
+        print(f"[INFO] Motion gate: {gate.passed} frames detected, {gate.skipped} skipped")
+    for name, stats in cache_stats().items():
+        print(f"[INFO] {name} cache: {stats['hits']} hits / {stats['misses']} misses")
+
+    if inference.error is not None:
+        raise inference.error
@@ -0,0 +1,192 @@
+"""
+Crop result cache
+Bounded LRU cache keyed by a perceptual hash of an image crop, so
+nearly identical crops from consecutive frames reuse earlier results
+"""
+
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from functools import wraps
+
+import cv2
+import numpy as np
+
+_MISS = object()
+
+
+def dhash(image, hash_size=8):
+    """
+    Difference hash (hash_size * hash_size bits): compares neighbouring
+    pixels of a tiny grayscale thumbnail, so small pixel noise does not
+    change it. Carries no color information.
+    """
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    small = cv2.resize(image, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hue_signature(image, hue_bins=6, levels=4):
+    """
+    Coarse color signature: share of pixels per hue sector plus dark /
+    gray / bright achromatic bins, each rounded to 1/levels. Two crops of
+    equal luminance but different color get different signatures.
+    """
+    small = cv2.resize(image, (32, 32), interpolation=cv2.INTER_AREA)
+    h, s, v = cv2.split(cv2.cvtColor(small, cv2.COLOR_BGR2HSV))
+    h, s, v = h.ravel().astype(np.int32), s.ravel(), v.ravel()
+
+    chromatic = (s > 60) & (v > 50)
+    # Shift by half a sector so red (hue ~0 / ~180) falls into one bin
+    sectors = ((h[chromatic] + 90 // hue_bins) % 180) * hue_bins // 180
+    achromatic = np.minimum(v[~chromatic] // 86, 2)
+
+    counts = np.concatenate([
+        np.bincount(sectors, minlength=hue_bins),
+        np.bincount(achromatic, minlength=3)
+    ])
+    return tuple(np.round(counts * levels / counts.sum()).astype(int).tolist())
+
+
+class CropCache:
+    """
+    Thread-safe LRU cache of results keyed by (dhash, signature, scope,
+    extra key). With max_distance > 0 a miss falls back to the closest
+    cached hash within that Hamming distance, but only among entries with
+    the same signature, scope and extra key. signature(image) adds
+    information the grayscale hash lacks (e.g. hue_signature for color
+    classifiers); entries expire after ttl seconds.
+    """
+
+    def __init__(self, maxsize=256, max_distance=0, ttl=None, hash_size=8, signature=None):
+        self.maxsize = maxsize
+        self.max_distance = max_distance
+        self.ttl = ttl
+        self.hash_size = hash_size
+        self.signature = signature
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()   # key -> (result, expires_at)
+        self._lock = threading.Lock()
+
+    def key(self, image, *args, scope=None):
+        sig = self.signature(image) if self.signature is not None else None
+        return dhash(image, self.hash_size), (sig, scope, args)
+
+    def _find(self, key, now):
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[1] is None or entry[1] > now:
+                return key
+            del self._entries[key]
+
+        if self.max_distance <= 0:
+            return None
+
+        h, rest = key
+        best, best_dist = None, self.max_distance + 1
+        for cached_key, (_, expires_at) in self._entries.items():
+            cached_h, cached_rest = cached_key
+            if cached_rest != rest or (expires_at is not None and expires_at <= now):
+                continue
+            dist = bin(cached_h ^ h).count("1")
+            if dist < best_dist:
+                best, best_dist = cached_key, dist
+        return best
+
+    def get(self, key):
+        """
+        Cached result for key, or a miss marker (see is_miss)
+        """
+        with self._lock:
+            found = self._find(key, time.monotonic())
+            if found is None:
+                self.misses += 1
+                return _MISS
+            self._entries.move_to_end(found)
+            self.hits += 1
+            return self._entries[found][0]
+
+    def put(self, key, result):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (result, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, image, fn, *args, scope=None):
+        key = self.key(image, *args, scope=scope)
+        result = self.get(key)
+        if result is _MISS:
+            result = fn(image, *args)
+            self.put(key, result)
+        return result
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._entries)
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+def is_miss(result):
+    return result is _MISS
+
+
+# name -> live caches with that name (one per camera analyzer)
+_caches = {}
+
+
+def cached_crop(name, maxsize=256, max_distance=0, ttl=None, hash_size=8, signature=None):
+    """
+    Decorator: cache fn(image, *args) results by crop content.
+    Call the wrapper with scope=... (e.g. a track id) to keep results of
+    different objects apart. Empty crops are passed straight through.
+    """
+    cache = CropCache(maxsize=maxsize, max_distance=max_distance, ttl=ttl,
+                      hash_size=hash_size, signature=signature)
+    _caches.setdefault(name, weakref.WeakSet()).add(cache)
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(image, *args, scope=None):
+            if image is None or image.size == 0:
+                return fn(image, *args)
+            return cache.get_or_compute(image, fn, *args, scope=scope)
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+def cache_stats():
+    """
+    Hit / miss counts per cache name, summed over all cameras
+    """
+    stats = {}
+    for name, caches in _caches.items():
+        total = {"hits": 0, "misses": 0, "size": 0}
+        for cache in list(caches):
+            s = cache.stats()
+            for k in total:
+                total[k] += s[k]
+        lookups = total["hits"] + total["misses"]
+        total["hit_rate"] = total["hits"] / lookups if lookups else 0.0
+        stats[name] = total
+    return stats
@@ -0,0 +1,274 @@
+"""
+Detector export tooling
+Exports the trained PyTorch checkpoint to CPU-friendly backends
+(including an INT8 post-training quantized OpenVINO model),
+checks that every backend returns the same detections and
+reports the accuracy / latency trade-off of each backend
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+from src.inference import BACKEND_PATHS, MODEL_PATH, detect_batch, load_model
+
+# backend -> (ultralytics export format, int8)
+EXPORT_FORMATS = {
+    "onnx": ("onnx", False),
+    "openvino": ("openvino", False),
+    "openvino-int8": ("openvino", True)
+}
+
+DATA_YAML = "dataset/data.yaml"
+PARITY_IMAGES = "dataset/test/images"
+REPORT_PATH = "outputs/quantization_report.json"
+
+
+def export(backend, imgsz=640, data=DATA_YAML):
+    if backend not in EXPORT_FORMATS:
+        raise ValueError(f"Cannot export backend '{backend}', expected one of {sorted(EXPORT_FORMATS)}")
+
+    fmt, int8 = EXPORT_FORMATS[backend]
+    print(f"Exporting {MODEL_PATH} -> {backend}...")
+
+    kwargs = {}
+    if int8:
+        # Post-training quantization, calibrated on the dataset images
+        kwargs = {"int8": True, "data": data}
+
+    # dynamic=True keeps the batch axis free so detect_batch works on every backend
+    path = YOLO(MODEL_PATH).export(
+        format=fmt,
+        imgsz=imgsz,
+        dynamic=True,
+        **kwargs
+    )
+
+    print(f"✓ Exported: {path}")
+    return path
+
+
+def box_iou(a, b):
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def match_detections(reference, candidate, iou_thr=0.9, conf_tol=0.05):
+    """
+    Greedily pair reference detections with candidate detections.
+    Returns (matched, missing, extra) counts.
+    """
+    unused = list(candidate)
+    matched = 0
+
+    for ref in sorted(reference, key=lambda d: -d["conf"]):
+        best, best_iou = None, iou_thr
+        for cand in unused:
+            if cand["class"] != ref["class"] or abs(cand["conf"] - ref["conf"]) > conf_tol:
+                continue
+            iou = box_iou(ref["bbox"], cand["bbox"])
+            if iou >= best_iou:
+                best, best_iou = cand, iou
+        if best is not None:
+            unused.remove(best)
+            matched += 1
+
+    return matched, len(reference) - matched, len(unused)
+
+
+def check_parity(backend, image_dir=PARITY_IMAGES, limit=50, iou_thr=0.9, conf_tol=0.05):
+    """
+    Compare a backend against the PyTorch model on sample images
+    """
+    paths = sorted(glob.glob(os.path.join(image_dir, "*.jpg")))[:limit]
+    if not paths:
+        print(f"⚠ No images found in {image_dir}")
+        return False
+
+    reference_model = load_model("pytorch")
+    backend_model = load_model(backend)
+
+    totals = {"matched": 0, "missing": 0, "extra": 0}
+    failed = []
+
+    for path in paths:
+        img = cv2.imread(path)
+        if img is None:
+            continue
+
+        reference = detect_batch([img], detector=reference_model)[0]
+        candidate = detect_batch([img], detector=backend_model)[0]
+
+        matched, missing, extra = match_detections(reference, candidate, iou_thr, conf_tol)
+        totals["matched"] += matched
+        totals["missing"] += missing
+        totals["extra"] += extra
+        if missing or extra:
+            failed.append(os.path.basename(path))
+
+    print("\n" + "="*60)
+    print(f"Parity: pytorch vs {backend} ({len(paths)} images)")
+    print("="*60)
+    print(f"  Matched: {totals['matched']}")
+    print(f"  Missing: {totals['missing']}")
+    print(f"  Extra:   {totals['extra']}")
+    for name in failed:
+        print(f"  ✗ {name}")
+
+    ok = not failed
+    print("\n✓ Outputs match" if ok else "\n⚠ Outputs differ")
+    return ok
+
+
+def measure_latency(backend, image_dir=PARITY_IMAGES, limit=50, warmup=3):
+    """
+    Per-image detect latency in milliseconds (batch size 1)
+    """
+    paths = sorted(glob.glob(os.path.join(image_dir, "*.jpg")))[:limit]
+    images = [img for img in (cv2.imread(p) for p in paths) if img is not None]
+    if not images:
+        return None
+
+    detector = load_model(backend)
+    for img in images[:warmup]:
+        detect_batch([img], detector=detector)
+
+    times = []
+    for img in images:
+        start = time.perf_counter()
+        detect_batch([img], detector=detector)
+        times.append((time.perf_counter() - start) * 1000)
+
+    times = np.array(times)
+    return {
+        "images": len(times),
+        "mean_ms": round(float(times.mean()), 2),
+        "p50_ms": round(float(np.percentile(times, 50)), 2),
+        "p95_ms": round(float(np.percentile(times, 95)), 2)
+    }
+
+
+def evaluate(backend, data=DATA_YAML, split="test"):
+    """
+    Per-class mAP of a backend on the dataset split
+    """
+    metrics = load_model(backend).val(
+        data=data,
+        split=split,
+        imgsz=640,
+        batch=1,
+        device="cpu",
+        plots=False,
+        verbose=False
+    )
+
+    names = metrics.names
+    per_class = {}
+    for i, c in enumerate(metrics.box.ap_class_index):
+        per_class[names[int(c)]] = {
+            "mAP50": round(float(metrics.box.ap50[i]), 4),
+            "mAP50-95": round(float(metrics.box.ap[i]), 4)
+        }
+
+    return {
+        "mAP50": round(float(metrics.box.map50), 4),
+        "mAP50-95": round(float(metrics.box.map), 4),
+        "per_class": per_class
+    }
+
+
+def quantization_report(backends=("pytorch", "openvino", "openvino-int8"),
+                        data=DATA_YAML, image_dir=PARITY_IMAGES,
+                        report_path=REPORT_PATH):
+    """
+    Compare accuracy and latency of each exported backend against FP32
+    """
+    report = {}
+    for backend in backends:
+        if not os.path.exists(BACKEND_PATHS[backend]):
+            print(f"⚠ Skipping {backend}: not exported")
+            continue
+
+        print(f"Evaluating {backend}...")
+        report[backend] = {
+            "accuracy": evaluate(backend, data=data),
+            "latency": measure_latency(backend, image_dir=image_dir)
+        }
+
+    if not report:
+        print("No backends to report on")
+        return report
+
+    baseline = "pytorch" if "pytorch" in report else next(iter(report))
+    base = report[baseline]
+
+    print("\n" + "="*60)
+    print(f"Quantization Report (baseline: {baseline})")
+    print("="*60)
+
+    for backend, r in report.items():
+        acc, lat = r["accuracy"], r["latency"]
+        print(f"\n{backend}:")
+        print(f"  mAP50-95: {acc['mAP50-95']:.4f} "
+              f"({acc['mAP50-95'] - base['accuracy']['mAP50-95']:+.4f})")
+
+        if lat and base["latency"]:
+            speedup = base["latency"]["mean_ms"] / lat["mean_ms"]
+            print(f"  Latency:  {lat['mean_ms']:.1f} ms mean, "
+                  f"{lat['p95_ms']:.1f} ms p95 ({speedup:.2f}x)")
+
+        for name, ap in acc["per_class"].items():
+            base_ap = base["accuracy"]["per_class"].get(name, {}).get("mAP50-95", 0.0)
+            print(f"    - {name}: {ap['mAP50-95']:.4f} ({ap['mAP50-95'] - base_ap:+.4f})")
+
+    os.makedirs(os.path.dirname(report_path), exist_ok=True)
+    with open(report_path, 'w') as f:
+        json.dump({"baseline": baseline, "backends": report}, f, indent=2)
+
+    print(f"\n✓ Report saved to: {report_path}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the detector to other backends')
+    parser.add_argument('--backend', choices=sorted(EXPORT_FORMATS),
+                        help='Export best.pt to this backend')
+    parser.add_argument('--parity', choices=sorted(EXPORT_FORMATS),
+                        help='Check this backend against the PyTorch model')
+    parser.add_argument('--images', default=PARITY_IMAGES,
+                        help='Image directory for the parity check')
+    parser.add_argument('--imgsz', type=int, default=640,
+                        help='Export input size')
+    parser.add_argument('--data', default=DATA_YAML,
+                        help='Dataset yaml used for INT8 calibration and the report')
+    parser.add_argument('--report', action='store_true',
+                        help='Compare per-class mAP and latency of all exported backends')
+
+    args = parser.parse_args()
+
+    if args.backend:
+        export(args.backend, imgsz=args.imgsz, data=args.data)
+
+    if args.parity:
+        if not check_parity(args.parity, image_dir=args.images):
+            sys.exit(1)
+
+    if args.report:
+        quantization_report(data=args.data, image_dir=args.images)
+
+    if not args.backend and not args.parity and not args.report:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
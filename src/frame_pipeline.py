@@ -0,0 +1,158 @@
+"""
+Frame pipeline building blocks
+Bounded drop-oldest queues, a latest-frame capture thread and
+per-stage FPS / latency counters for the real-time camera loops
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+
+class DropOldestQueue:
+    """
+    Bounded queue that never blocks the producer: when full, the oldest
+    item is discarded so consumers always see the freshest data
+    """
+
+    def __init__(self, maxsize=1):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def put(self, item):
+        with self._lock:
+            while True:
+                try:
+                    self._queue.put_nowait(item)
+                    return
+                except queue.Full:
+                    try:
+                        self._queue.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+
+    def get(self, timeout=None):
+        """
+        Returns None if nothing arrived within timeout
+        """
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def qsize(self):
+        return self._queue.qsize()
+
+
+class StageStats:
+    """
+    Smoothed throughput of one pipeline stage
+    """
+
+    def __init__(self, name, smoothing=0.9):
+        self.name = name
+        self.smoothing = smoothing
+        self.count = 0
+        self.fps = 0.0
+        self._last = None
+
+    def tick(self):
+        now = time.perf_counter()
+        if self._last is not None:
+            dt = now - self._last
+            if dt > 0:
+                inst = 1.0 / dt
+                self.fps = inst if self.count <= 1 else (
+                    self.smoothing * self.fps + (1 - self.smoothing) * inst
+                )
+        self._last = now
+        self.count += 1
+
+
+class LatencyStats:
+    """
+    Rolling end-to-end latency window (milliseconds)
+    """
+
+    def __init__(self, window=120):
+        self._samples = deque(maxlen=window)
+
+    def record(self, started_at):
+        self._samples.append((time.perf_counter() - started_at) * 1000)
+
+    def summary(self):
+        if not self._samples:
+            return {"mean_ms": 0.0, "p95_ms": 0.0}
+        samples = np.fromiter(self._samples, dtype=np.float64)
+        return {
+            "mean_ms": float(samples.mean()),
+            "p95_ms": float(np.percentile(samples, 95))
+        }
+
+
+class CaptureThread(threading.Thread):
+    """
+    Reads frames as fast as the source delivers them and keeps only
+    the newest one(s) in a drop-oldest queue, so the camera buffer never
+    fills up behind a slow consumer.
+
+    Items are (seq, captured_at, frame) with captured_at from perf_counter.
+    Video files are paced to their native FPS (pace=None auto-detects),
+    so they behave like a live camera in local tests.
+    """
+
+    def __init__(self, source=0, size=None, out_queue=None, name="capture", pace=None):
+        super().__init__(name=name, daemon=True)
+        self.source = source
+        self.size = size
+        self.out = out_queue if out_queue is not None else DropOldestQueue(maxsize=1)
+        self.pace = isinstance(source, str) and os.path.isfile(source) if pace is None else pace
+        self.stats = StageStats(name)
+        self.finished = threading.Event()
+        self._stop_event = threading.Event()
+        self._cap = cv2.VideoCapture(source)
+
+    def is_opened(self):
+        return self._cap.isOpened()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def is_done(self):
+        return self.finished.is_set() and self.out.qsize() == 0
+
+    def run(self):
+        seq = 0
+        fps = self._cap.get(cv2.CAP_PROP_FPS) if self.pace else 0
+        interval = 1.0 / fps if fps and fps > 0 else 0.0
+        next_at = time.perf_counter()
+
+        try:
+            while not self._stop_event.is_set():
+                if interval:
+                    next_at += interval
+                    delay = next_at - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+
+                ret, frame = self._cap.read()
+                if not ret:
+                    print(f"⚠️ Frame not received from {self.source}")
+                    break
+
+                if self.size is not None:
+                    frame = cv2.resize(frame, self.size)
+
+                self.out.put((seq, time.perf_counter(), frame))
+                self.stats.tick()
+                seq += 1
+        finally:
+            self._cap.release()
+            self.finished.set()
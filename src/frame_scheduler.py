@@ -0,0 +1,120 @@
+"""
+Adaptive frame scheduler
+Measures per-frame processing cost and trades frame skip, detector input
+size and OCR on/off to hold a target FPS / latency budget
+"""
+
+import time
+
+
+class AdaptiveScheduler:
+    """
+    budget_ms is the tighter of 1000 / target_fps and target_latency_ms.
+
+    When frames cost more than the budget, quality is reduced step by step
+    (smaller imgsz first, then OCR off); when there is headroom it is
+    restored in reverse order. Frames arriving faster than target_fps are
+    skipped so the detector is not run more often than needed.
+    """
+
+    IMGSZ_LEVELS = (320, 416, 512, 640)
+
+    def __init__(self, target_fps=10.0, target_latency_ms=None, max_skip=5,
+                 smoothing=0.8, adjust_every=5, headroom=0.7):
+        budgets = []
+        if target_fps:
+            budgets.append(1000.0 / target_fps)
+        if target_latency_ms:
+            budgets.append(float(target_latency_ms))
+        if not budgets:
+            raise ValueError("Need target_fps or target_latency_ms")
+
+        self.target_fps = target_fps
+        self.budget_ms = min(budgets)
+        self.max_skip = max_skip
+        self.smoothing = smoothing
+        self.adjust_every = adjust_every
+        self.headroom = headroom
+
+        self.level = len(self.IMGSZ_LEVELS) - 1
+        self.run_ocr = True
+        self.skip = 0
+        self.cost_ms = None
+        self.input_fps = 0.0
+
+        self._since_skip = 0
+        self._since_adjust = 0
+        self._last_input = None
+
+    @property
+    def imgsz(self):
+        return self.IMGSZ_LEVELS[self.level]
+
+    def admit(self):
+        """
+        Call once per incoming frame; False means skip this frame
+        """
+        now = time.perf_counter()
+        if self._last_input is not None and now > self._last_input:
+            inst = 1.0 / (now - self._last_input)
+            self.input_fps = inst if not self.input_fps else (
+                self.smoothing * self.input_fps + (1 - self.smoothing) * inst
+            )
+        self._last_input = now
+
+        if self.target_fps and self.input_fps:
+            wanted = int(round(self.input_fps / self.target_fps)) - 1
+            self.skip = max(0, min(self.max_skip, wanted))
+
+        if self._since_skip < self.skip:
+            self._since_skip += 1
+            return False
+
+        self._since_skip = 0
+        return True
+
+    def record(self, cost_ms):
+        """
+        Report how long the admitted frame took to process
+        """
+        self.cost_ms = cost_ms if self.cost_ms is None else (
+            self.smoothing * self.cost_ms + (1 - self.smoothing) * cost_ms
+        )
+
+        self._since_adjust += 1
+        if self._since_adjust < self.adjust_every:
+            return
+        self._since_adjust = 0
+
+        if self.cost_ms > self.budget_ms:
+            self._degrade()
+        elif self.cost_ms < self.budget_ms * self.headroom:
+            self._upgrade()
+
+    def _degrade(self):
+        if self.level > 0:
+            self.level -= 1
+        elif self.run_ocr:
+            self.run_ocr = False
+
+    def _upgrade(self):
+        if not self.run_ocr:
+            self.run_ocr = True
+        elif self.level < len(self.IMGSZ_LEVELS) - 1:
+            self.level += 1
+
+    def decisions(self):
+        return {
+            "budget_ms": round(self.budget_ms, 1),
+            "cost_ms": round(self.cost_ms, 1) if self.cost_ms is not None else None,
+            "input_fps": round(self.input_fps, 1),
+            "skip": self.skip,
+            "imgsz": self.imgsz,
+            "run_ocr": self.run_ocr
+        }
+
+    def describe(self):
+        d = self.decisions()
+        cost = f"{d['cost_ms']:.0f}" if d["cost_ms"] is not None else "-"
+        ocr = "on" if d["run_ocr"] else "off"
+        return f"cost {cost}/{d['budget_ms']:.0f} ms | skip {d['skip']} | imgsz {d['imgsz']} | OCR {ocr}"
@@ -0,0 +1,201 @@
+"""
+Upload decoding
+Size guards and reduced-resolution decoding for uploaded images. YOLO
+only ever sees a 640 px input, so large JPEGs are decoded directly at
+1/2, 1/4 or 1/8 scale (libjpeg skips the discarded DCT coefficients);
+plate crops are re-decoded at a finer scale only when OCR needs it.
+"""
+
+import os
+import struct
+
+import cv2
+import numpy as np
+
+from src import metrics
+from src.utils import resize_image
+
+# Rejected before decoding (413)
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", 25 * 1024 * 1024))
+MAX_IMAGE_PIXELS = int(os.environ.get("MAX_IMAGE_PIXELS", 50_000_000))
+
+# Longest side kept for detection (1.5x the 640 px model input)
+DECODE_MIN_SIDE = int(os.environ.get("DECODE_MIN_SIDE", 960))
+
+# Plate crops narrower than this are re-decoded at a finer scale for OCR
+PLATE_MIN_WIDTH = int(os.environ.get("PLATE_MIN_WIDTH", 160))
+
+REDUCED_FLAGS = {
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8
+}
+
+# Start-of-frame markers carry the image size (not DHT / JPG / DAC)
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+# Room for multipart headers around the image in a request body
+MULTIPART_SLACK = 64 * 1024
+
+
+class ImageTooLarge(ValueError):
+    pass
+
+
+# -----------------------------
+# Header parsing
+# -----------------------------
+def is_jpeg(data):
+    return data[:3] == b"\xff\xd8\xff"
+
+
+def jpeg_size(data):
+    """
+    (width, height) from the first SOF segment, or None
+    """
+    i, n = 2, len(data)
+    while i + 4 <= n:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            # Fill byte
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            i += 2
+            continue
+
+        length = struct.unpack(">H", data[i + 2:i + 4])[0]
+        if marker in _SOF_MARKERS:
+            if i + 9 > n:
+                return None
+            height, width = struct.unpack(">HH", data[i + 5:i + 9])
+            return width, height
+        i += 2 + length
+    return None
+
+
+def image_size(data):
+    """
+    (width, height) read from a JPEG or PNG header without decoding
+    """
+    if is_jpeg(data):
+        return jpeg_size(data)
+    if data[:8] == b"\x89PNG\r\n\x1a\n" and len(data) >= 24:
+        return struct.unpack(">II", data[16:24])
+    return None
+
+
+def body_too_large(content_length, limit=MAX_UPLOAD_BYTES):
+    """
+    Early check on the request's Content-Length, before reading the body
+    """
+    return content_length is not None and int(content_length) > limit + MULTIPART_SLACK
+
+
+def check_upload(data):
+    """
+    Raise ImageTooLarge for uploads over the byte or pixel limits
+    """
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise ImageTooLarge(f"Upload exceeds {MAX_UPLOAD_BYTES} bytes")
+
+    size = image_size(data)
+    if size is not None and size[0] * size[1] > MAX_IMAGE_PIXELS:
+        raise ImageTooLarge(f"Image exceeds {MAX_IMAGE_PIXELS} pixels")
+    return size
+
+
+def reduced_scale(width, height, min_side=DECODE_MIN_SIDE):
+    """
+    Largest JPEG reduction factor that keeps the longest side >= min_side
+    """
+    for scale in (8, 4, 2):
+        if max(width, height) / scale >= min_side:
+            return scale
+    return 1
+
+
+# -----------------------------
+# Decoding
+# -----------------------------
+class DecodedUpload:
+    """
+    An upload decoded for detection (``image``, ``scale`` times smaller than
+    the original) that can hand out finer crops for OCR.
+    Bounding boxes are always in ``image`` coordinates.
+    """
+
+    def __init__(self, data, image, scale, full=None):
+        self.data = data
+        self.image = image
+        self.scale = scale
+        self._decoded = {scale: image}
+        # JPEGs are re-decoded at finer scales; other formats keep the original
+        self._reducible = full is None
+        if full is not None:
+            self._decoded[1] = full
+
+    def _at_scale(self, scale):
+        img = self._decoded.get(scale)
+        if img is None:
+            flag = REDUCED_FLAGS.get(scale, cv2.IMREAD_COLOR)
+            with metrics.stage("decode_crop"):
+                img = cv2.imdecode(np.frombuffer(self.data, np.uint8), flag)
+            self._decoded[scale] = img
+        return img
+
+    def crop(self, bbox, min_width=PLATE_MIN_WIDTH):
+        """
+        Crop bbox at the coarsest decoded scale where it is at least
+        min_width pixels wide
+        """
+        x1, y1, x2, y2 = bbox
+        if self.scale == 1 or x2 - x1 >= min_width:
+            return self.image[y1:y2, x1:x2]
+
+        target = 1
+        if self._reducible:
+            target = self.scale
+            while target > 1 and (x2 - x1) * self.scale / target < min_width:
+                target //= 2
+
+        img = self._at_scale(target)
+        if img is None:
+            return self.image[y1:y2, x1:x2]
+
+        f = self.scale / target
+        return img[int(y1 * f):int(y2 * f), int(x1 * f):int(x2 * f)]
+
+
+def decode_upload(data, min_side=DECODE_MIN_SIDE):
+    """
+    Check limits and decode an upload for detection.
+    Returns a DecodedUpload, or None if the bytes are not an image.
+    """
+    with metrics.stage("decode"):
+        return _decode_upload(data, min_side)
+
+
+def _decode_upload(data, min_side):
+    size = check_upload(data)
+    buf = np.frombuffer(data, np.uint8)
+
+    if is_jpeg(data) and size is not None:
+        scale = reduced_scale(*size, min_side=min_side)
+        if scale > 1:
+            img = cv2.imdecode(buf, REDUCED_FLAGS[scale])
+            return None if img is None else DecodedUpload(data, img, scale)
+
+    img = cv2.imdecode(buf, cv2.IMREAD_COLOR)
+    if img is None:
+        return None
+
+    # Other formats decode at full size; shrink for detection, crop from the original
+    small = resize_image(img, max_size=max(min_side, 1))
+    scale = img.shape[1] / small.shape[1]
+    if small is img:
+        return DecodedUpload(data, img, 1)
+    return DecodedUpload(data, small, scale, full=img)
@@ -1,7 +1,90 @@
-from ultralytics import YOLO
+import os
+import threading
+
+import numpy as np
+
+from src import metrics
 
 MODEL_PATH = "runs/detect/train10/weights/best.pt"
-model = YOLO(MODEL_PATH)
+
+# Inference backend: "pytorch", "onnx", "openvino" or "openvino-int8"
+# Exported graphs are created with: python -m src.export_model --backend <name>
+BACKEND = os.environ.get("DETECTOR_BACKEND", "pytorch")
+
+BACKEND_PATHS = {
+    "pytorch": MODEL_PATH,
+    "onnx": "runs/detect/train10/weights/best.onnx",
+    "openvino": "runs/detect/train10/weights/best_openvino_model",
+    "openvino-int8": "runs/detect/train10/weights/best_int8_openvino_model"
+}
+
+
+def load_model(backend=BACKEND):
+    """
+    Load the detector for the given backend.
+    Ultralytics picks the runtime (torch / onnxruntime / openvino) from the path.
+    """
+    if backend not in BACKEND_PATHS:
+        raise ValueError(
+            f"Unknown detector backend '{backend}', expected one of {sorted(BACKEND_PATHS)}"
+        )
+
+    path = BACKEND_PATHS[backend]
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"Model for backend '{backend}' not found at {path}. "
+            f"Run: python -m src.export_model --backend {backend}"
+        )
+
+    # Imported here so importing this module stays cheap
+    from ultralytics import YOLO
+
+    return YOLO(path, task="detect")
+
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_model():
+    """
+    Load the configured detector on first use (thread-safe)
+    """
+    global _model
+
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = load_model()
+
+    return _model
+
+
+def model_version(backend=BACKEND):
+    """
+    Identifies the weights in use (backend, size and mtime of the model
+    files) so cached results are not reused across model updates
+    """
+    path = BACKEND_PATHS.get(backend, "")
+    if os.path.isdir(path):
+        files = [os.path.join(root, f) for root, _, names in os.walk(path) for f in names]
+    else:
+        files = [path] if os.path.exists(path) else []
+
+    stats = [os.stat(f) for f in files]
+    size = sum(st.st_size for st in stats)
+    mtime = max((st.st_mtime for st in stats), default=0)
+    return f"{backend}:{size}:{mtime:.0f}"
+
+
+def warmup(runs=2):
+    """
+    Run dummy frames through the detector so the first real request
+    does not pay for model loading and graph initialisation
+    """
+    dummy = np.zeros((640, 640, 3), dtype=np.uint8)
+    for _ in range(runs):
+        detect(dummy)
 
 # Per-class confidence thresholds
 CLASS_CONF = {
@@ -11,35 +94,95 @@ CLASS_CONF = {
     3: 0.30,  # number_plate
     4: 0.20   # sugarcane (lower because it is visually complex)
 }
+DEFAULT_CONF = 0.3
+
+# Threshold lookup table indexed by class id (last slot = unknown classes)
+CONF_TABLE = np.array(
+    [CLASS_CONF.get(c, DEFAULT_CONF) for c in range(max(CLASS_CONF) + 1)] + [DEFAULT_CONF],
+    dtype=np.float64
+)
+
+# Compact result format for callers that do not need dicts
+DETECTION_DTYPE = np.dtype([
+    ("class", np.int16),
+    ("conf", np.float32),
+    ("bbox", np.int32, (4,))
+])
+
 
-def detect(image):
-    results = model.predict(
-        source=image,
-        imgsz=640,
-        conf=0.15,   # global floor
-        iou=0.5,
-        save=False,
-        verbose=False
+def _filter_boxes(cls, conf, xyxy):
+    """
+    Class-aware confidence filtering over whole arrays at once
+    """
+    cls = cls.astype(np.int64)
+    idx = np.where((cls >= 0) & (cls < len(CONF_TABLE) - 1), cls, len(CONF_TABLE) - 1)
+    keep = conf.astype(np.float64) >= CONF_TABLE[idx]
+
+    out = np.empty(int(keep.sum()), dtype=DETECTION_DTYPE)
+    out["class"] = cls[keep]
+    out["conf"] = conf[keep]
+    out["bbox"] = xyxy[keep].astype(np.int32)   # truncates like int()
+    return out
+
+
+def _parse_result(r):
+    if r.boxes is None or len(r.boxes) == 0:
+        return np.empty(0, dtype=DETECTION_DTYPE)
+
+    boxes = r.boxes
+    return _filter_boxes(
+        boxes.cls.cpu().numpy(),
+        boxes.conf.cpu().numpy(),
+        boxes.xyxy.cpu().numpy()
     )
 
-    detections = []
 
-    for r in results:
-        if r.boxes is None:
-            continue
+def to_dicts(detections):
+    """
+    Convert a structured detection array to the list-of-dicts format
+    """
+    return [
+        {"class": c, "conf": conf, "bbox": bbox}
+        for c, conf, bbox in zip(
+            detections["class"].tolist(),
+            detections["conf"].tolist(),
+            detections["bbox"].tolist()
+        )
+    ]
+
+
+def detect_batch(images, structured=False, detector=None, imgsz=640):
+    """
+    Run one YOLO forward pass over a list of images.
+    Returns one detection list per image, in input order.
+
+    With structured=True each entry is a DETECTION_DTYPE array
+    instead of a list of {"class", "conf", "bbox"} dicts.
+    detector overrides the configured model (used for backend parity checks).
+    imgsz can be lowered to trade accuracy for speed.
+    """
+    images = list(images)
+    if not images:
+        return []
+
+    if detector is None:
+        detector = get_model()
 
-        for box in r.boxes:
-            cls = int(box.cls[0])
-            conf = float(box.conf[0])
+    with metrics.stage("detect"):
+        results = detector.predict(
+            source=images,
+            imgsz=imgsz,
+            conf=0.15,   # global floor
+            iou=0.5,
+            save=False,
+            verbose=False
+        )
 
-            # class-aware confidence filtering
-            if conf < CLASS_CONF.get(cls, 0.3):
-                continue
+    parsed = [_parse_result(r) for r in results]
+    if structured:
+        return parsed
+    return [to_dicts(p) for p in parsed]
 
-            detections.append({
-                "class": cls,
-                "conf": conf,
-                "bbox": list(map(int, box.xyxy[0]))
-            })
 
-    return detections
+def detect(image, structured=False, imgsz=640):
+    return detect_batch([image], structured=structured, imgsz=imgsz)[0]
@@ -0,0 +1,499 @@
+"""
+Detection log store
+Append-only SQLite (WAL mode) store for detection log entries with
+batched group commits, replacing the rewrite-the-whole-file JSON log.
+
+Minute / hour / day rollups are updated in the same transaction as the
+entries, so statistics for any time window are answered from a handful
+of indexed range queries instead of a scan over the whole history.
+"""
+
+import argparse
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+DB_PATH = "outputs/logs/detections.db"
+LEGACY_JSON_PATH = "outputs/logs/detections.json"
+
+FIELDS = [
+    "timestamp",
+    "vehicle_type",
+    "sugarcane_detected",
+    "number_plate_present",
+    "number_plate_text",
+    "number_plate_color",
+    "screenshot"
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS detections (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    ts REAL NOT NULL,
+    vehicle_type TEXT,
+    sugarcane_detected INTEGER,
+    number_plate_present INTEGER,
+    number_plate_text TEXT,
+    number_plate_color TEXT,
+    screenshot TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_detections_ts ON detections (ts);
+CREATE INDEX IF NOT EXISTS idx_detections_type_ts ON detections (vehicle_type, ts);
+CREATE INDEX IF NOT EXISTS idx_detections_plate_ts ON detections (number_plate_text, ts);
+
+-- vehicle_type / plate_color use '' for "none" so they can be part of the key
+CREATE TABLE IF NOT EXISTS rollups (
+    granularity TEXT NOT NULL,
+    bucket REAL NOT NULL,
+    vehicle_type TEXT NOT NULL,
+    plate_color TEXT NOT NULL,
+    detections INTEGER NOT NULL DEFAULT 0,
+    sugarcane INTEGER NOT NULL DEFAULT 0,
+    plates INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (granularity, bucket, vehicle_type, plate_color)
+);
+"""
+
+# Finest to coarsest; buckets are aligned to local time
+GRANULARITIES = ("minute", "hour", "day")
+
+_STEP = {
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1)
+}
+
+
+def _epoch(timestamp):
+    try:
+        return datetime.fromisoformat(timestamp).timestamp()
+    except (TypeError, ValueError):
+        return time.time()
+
+
+def _to_bool(value):
+    return None if value is None else int(bool(value))
+
+
+def bucket_start(ts, granularity):
+    dt = datetime.fromtimestamp(ts).replace(second=0, microsecond=0)
+    if granularity in ("hour", "day"):
+        dt = dt.replace(minute=0)
+    if granularity == "day":
+        dt = dt.replace(hour=0)
+    return dt.timestamp()
+
+
+def _bucket_ceil(ts, granularity):
+    start = bucket_start(ts, granularity)
+    if start == ts:
+        return ts
+    return (datetime.fromtimestamp(start) + _STEP[granularity]).timestamp()
+
+
+def plan_window(start, end, levels=("day", "hour", "minute")):
+    """
+    Split [start, end) into the coarsest aligned rollup ranges plus raw
+    edges, e.g. raw seconds | minutes | hours | days | hours | minutes | raw
+    """
+    if start >= end:
+        return []
+    if not levels:
+        return [("raw", start, end)]
+
+    g = levels[0]
+    lo, hi = _bucket_ceil(start, g), bucket_start(end, g)
+    if lo >= hi:
+        return plan_window(start, end, levels[1:])
+
+    return plan_window(start, lo, levels[1:]) + [(g, lo, hi)] + plan_window(hi, end, levels[1:])
+
+
+def _rollup_keys(row):
+    """
+    Rollup dimension key and counters contributed by one detection row
+    """
+    _, ts, vehicle_type, sugarcane, plate_present, _, plate_color = row[:7]
+    color = (plate_color or "Unknown") if plate_present else ""
+    return (vehicle_type or "", color), (1, 1 if sugarcane else 0, 1 if plate_present else 0)
+
+
+def _empty_stats():
+    return {
+        'total_detections': 0,
+        'vehicle_types': {},
+        'sugarcane_count': 0,
+        'plates_detected': 0,
+        'plate_colors': {}
+    }
+
+
+def _add_to_stats(stats, vehicle_type, plate_color, detections, sugarcane, plates):
+    vehicle_type = vehicle_type or None
+    stats['total_detections'] += detections
+    stats['vehicle_types'][vehicle_type] = stats['vehicle_types'].get(vehicle_type, 0) + detections
+    stats['sugarcane_count'] += sugarcane
+    stats['plates_detected'] += plates
+    if plates:
+        stats['plate_colors'][plate_color] = stats['plate_colors'].get(plate_color, 0) + plates
+
+
+class DetectionLogStore:
+    """
+    Entries are buffered and written in one transaction per batch
+    (group commit) once batch_size entries are waiting or flush_interval
+    seconds have passed since the last commit. A background thread
+    commits a waiting batch after flush_interval even if nothing else is
+    appended; flush() forces a commit.
+    """
+
+    def __init__(self, path=DB_PATH, batch_size=100, flush_interval=0.5):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._last_flush = time.monotonic()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL: a crash can lose the last commits but never corrupts the log
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+        # Databases written before evidence screenshots were linked
+        columns = {r[1] for r in self._conn.execute("PRAGMA table_info(detections)")}
+        if "screenshot" not in columns:
+            self._conn.execute("ALTER TABLE detections ADD COLUMN screenshot TEXT")
+
+        # Databases written before rollups existed
+        if self._conn.execute("SELECT 1 FROM rollups LIMIT 1").fetchone() is None:
+            self.rebuild_rollups()
+
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="log-store-flush", daemon=True)
+        self._flusher.start()
+
+    # -----------------------------
+    # Writes
+    # -----------------------------
+    def append(self, entry):
+        self.append_many([entry])
+
+    def append_many(self, entries):
+        with self._lock:
+            self._buffer.extend(self._row(e) for e in entries)
+            due = (
+                len(self._buffer) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+            if due:
+                self._commit()
+
+    def flush(self):
+        with self._lock:
+            self._commit()
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.flush_interval):
+            with self._lock:
+                if self._buffer and time.monotonic() - self._last_flush >= self.flush_interval:
+                    try:
+                        self._commit()
+                    except sqlite3.Error as e:
+                        # Rows stay buffered; the next append or tick retries
+                        print(f"[WARN] Detection log commit failed: {e}")
+
+    def _row(self, entry):
+        timestamp = entry.get("timestamp") or datetime.now().isoformat()
+        return (
+            timestamp,
+            _epoch(timestamp),
+            entry.get("vehicle_type"),
+            _to_bool(entry.get("sugarcane_detected")),
+            _to_bool(entry.get("number_plate_present")),
+            entry.get("number_plate_text", "N/A"),
+            entry.get("number_plate_color", "N/A"),
+            entry.get("screenshot")
+        )
+
+    def _write_rows(self, rows):
+        self._conn.executemany(
+            "INSERT INTO detections (timestamp, ts, vehicle_type, sugarcane_detected, "
+            "number_plate_present, number_plate_text, number_plate_color, screenshot) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+
+    def _update_rollups(self, rows):
+        totals = defaultdict(lambda: [0, 0, 0])
+        for row in rows:
+            key, counts = _rollup_keys(row)
+            for g in GRANULARITIES:
+                t = totals[(g, bucket_start(row[1], g)) + key]
+                t[0] += counts[0]
+                t[1] += counts[1]
+                t[2] += counts[2]
+
+        self._conn.executemany(
+            "INSERT INTO rollups (granularity, bucket, vehicle_type, plate_color, "
+            "detections, sugarcane, plates) VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (granularity, bucket, vehicle_type, plate_color) DO UPDATE SET "
+            "detections = detections + excluded.detections, "
+            "sugarcane = sugarcane + excluded.sugarcane, "
+            "plates = plates + excluded.plates",
+            [key + tuple(t) for key, t in totals.items()]
+        )
+
+    def rebuild_rollups(self):
+        """
+        Recompute all rollups from the detections table
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT timestamp, ts, vehicle_type, sugarcane_detected, number_plate_present, "
+                "number_plate_text, number_plate_color FROM detections"
+            ).fetchall()
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute("DELETE FROM rollups")
+                self._update_rollups(rows)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _commit(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+
+        rows, self._buffer = self._buffer, []
+        self._conn.execute("BEGIN")
+        try:
+            self._write_rows(rows)
+            self._update_rollups(rows)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            self._buffer = rows + self._buffer
+            raise
+
+    # -----------------------------
+    # Reads
+    # -----------------------------
+    def _query(self, sql, params=()):
+        with self._lock:
+            self._commit()
+            return self._conn.execute(sql, params).fetchall()
+
+    def count(self):
+        return self._query("SELECT COUNT(*) FROM detections")[0][0]
+
+    def iter_entries(self, start=None, end=None, vehicle_type=None, plate=None):
+        """
+        Entries in time order; time / vehicle type / plate filters use indexes
+        """
+        where, params = self._filters(start, end, vehicle_type, plate)
+        rows = self._query(
+            "SELECT timestamp, vehicle_type, sugarcane_detected, number_plate_present, "
+            f"number_plate_text, number_plate_color, screenshot FROM detections{where} ORDER BY ts, id",
+            params
+        )
+        for row in rows:
+            entry = dict(zip(FIELDS, row))
+            for key in ("sugarcane_detected", "number_plate_present"):
+                if entry[key] is not None:
+                    entry[key] = bool(entry[key])
+            yield entry
+
+    @staticmethod
+    def _filters(start=None, end=None, vehicle_type=None, plate=None):
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("ts < ?")
+            params.append(end)
+        if vehicle_type is not None:
+            clauses.append("vehicle_type = ?")
+            params.append(vehicle_type)
+        if plate is not None:
+            clauses.append("number_plate_text = ?")
+            params.append(plate)
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        return where, params
+
+    def stats(self, start=None, end=None, vehicle_type=None, plate=None):
+        """
+        Statistics for [start, end) (epoch seconds, None = open ended) in the
+        same shape as utils.get_detection_statistics. Served from rollups;
+        only the sub-minute edges of the window touch raw rows.
+        """
+        stats = _empty_stats()
+
+        if plate is not None:
+            # Plates are too many to roll up; use the plate index instead
+            for entry in self.iter_entries(start, end, vehicle_type, plate):
+                plate_present = entry["number_plate_present"]
+                color = (entry["number_plate_color"] or "Unknown") if plate_present else ""
+                _add_to_stats(stats, entry["vehicle_type"], color, 1,
+                              1 if entry["sugarcane_detected"] else 0, 1 if plate_present else 0)
+            return stats
+
+        if start is None and end is None:
+            segments = [("day", float("-inf"), float("inf"))]
+        else:
+            bounds = self._query("SELECT MIN(ts), MAX(ts) FROM detections")[0]
+            if bounds[0] is None:
+                return stats
+            lo = start if start is not None else bucket_start(bounds[0], "day")
+            hi = end if end is not None else bounds[1] + 1
+            segments = plan_window(lo, hi)
+
+        type_filter = "" if vehicle_type is None else " AND vehicle_type = ?"
+        type_params = [] if vehicle_type is None else [vehicle_type]
+
+        for granularity, lo, hi in segments:
+            if granularity == "raw":
+                rows = self._query(
+                    "SELECT COALESCE(vehicle_type, ''), "
+                    "CASE WHEN number_plate_present THEN COALESCE(number_plate_color, 'Unknown') ELSE '' END, "
+                    "COUNT(*), SUM(CASE WHEN sugarcane_detected THEN 1 ELSE 0 END), "
+                    "SUM(CASE WHEN number_plate_present THEN 1 ELSE 0 END) "
+                    f"FROM detections WHERE ts >= ? AND ts < ?{type_filter} GROUP BY 1, 2",
+                    [lo, hi] + type_params
+                )
+            else:
+                rows = self._query(
+                    "SELECT vehicle_type, plate_color, SUM(detections), SUM(sugarcane), SUM(plates) "
+                    f"FROM rollups WHERE granularity = ? AND bucket >= ? AND bucket < ?{type_filter} "
+                    "GROUP BY vehicle_type, plate_color",
+                    [granularity, lo, hi] + type_params
+                )
+            for row in rows:
+                _add_to_stats(stats, *row)
+
+        return stats
+
+    def timeseries(self, granularity="hour", start=None, end=None, vehicle_type=None):
+        """
+        Per-bucket counts for dashboards: [{bucket, vehicle_type, detections,
+        sugarcane, plates, plate_colors}] ordered by bucket
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of {GRANULARITIES}")
+
+        sql = ("SELECT bucket, vehicle_type, plate_color, detections, sugarcane, plates "
+               "FROM rollups WHERE granularity = ?")
+        params = [granularity]
+        if start is not None:
+            sql += " AND bucket >= ?"
+            params.append(bucket_start(start, granularity))
+        if end is not None:
+            sql += " AND bucket < ?"
+            params.append(end)
+        if vehicle_type is not None:
+            sql += " AND vehicle_type = ?"
+            params.append(vehicle_type)
+
+        series = {}
+        for bucket, vtype, color, detections, sugarcane, plates in self._query(sql + " ORDER BY bucket", params):
+            point = series.setdefault((bucket, vtype), {
+                "bucket": datetime.fromtimestamp(bucket).isoformat(),
+                "vehicle_type": vtype or None,
+                "detections": 0,
+                "sugarcane": 0,
+                "plates": 0,
+                "plate_colors": {}
+            })
+            point["detections"] += detections
+            point["sugarcane"] += sugarcane
+            point["plates"] += plates
+            if plates:
+                point["plate_colors"][color] = point["plate_colors"].get(color, 0) + plates
+
+        return list(series.values())
+
+    # -----------------------------
+    # Migration
+    # -----------------------------
+    def migrate_json(self, json_path=LEGACY_JSON_PATH, rename=True):
+        """
+        Import entries from the old JSON log; the old file is renamed
+        to <name>.migrated so it is not imported twice
+        """
+        if not os.path.exists(json_path):
+            return 0
+
+        with open(json_path, 'r') as f:
+            logs = json.load(f)
+
+        for start in range(0, len(logs), 1000):
+            self.append_many(logs[start:start + 1000])
+        self.flush()
+
+        if rename:
+            os.replace(json_path, json_path + ".migrated")
+
+        print(f"✓ Migrated {len(logs)} entries from {json_path}")
+        return len(logs)
+
+    def close(self):
+        self._closed.set()
+        self._flusher.join()
+        self.flush()
+        self._conn.close()
+
+
+_default_stores = {}
+_default_lock = threading.Lock()
+
+
+def get_store(path=DB_PATH):
+    """
+    Shared store per database path, flushed at interpreter exit
+    """
+    with _default_lock:
+        store = _default_stores.get(path)
+        if store is None:
+            store = DetectionLogStore(path)
+            _default_stores[path] = store
+            atexit.register(store.flush)
+        return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Detection log store')
+    parser.add_argument('--db', default=DB_PATH, help='SQLite database path')
+    parser.add_argument('--migrate', nargs='?', const=LEGACY_JSON_PATH,
+                        help='Import an old JSON detection log')
+    parser.add_argument('--series', choices=GRANULARITIES,
+                        help='Print per-minute / hour / day counts')
+    parser.add_argument('--hours', type=float, help='Only the last N hours')
+    parser.add_argument('--vehicle-type', help='Only this vehicle type')
+
+    args = parser.parse_args()
+    start = time.time() - args.hours * 3600 if args.hours else None
+
+    if args.migrate:
+        get_store(args.db).migrate_json(args.migrate)
+    elif args.series:
+        for point in get_store(args.db).timeseries(args.series, start=start, vehicle_type=args.vehicle_type):
+            print(json.dumps(point))
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
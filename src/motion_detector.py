@@ -0,0 +1,63 @@
+"""
+Motion gate
+Cheap scene-change check on a downscaled grayscale frame, used to skip
+the detector while the camera is looking at an unchanged scene
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """
+    Frame differencing against the previous downscaled frame.
+
+    sensitivity:       per-pixel intensity change that counts as "changed" (0-255)
+    min_changed_ratio: fraction of changed pixels that counts as motion
+    refresh_interval:  force a detector run at least this often (seconds)
+    width:             width of the downscaled comparison frame
+    """
+
+    def __init__(self, sensitivity=25, min_changed_ratio=0.005, refresh_interval=5.0, width=160):
+        self.sensitivity = sensitivity
+        self.min_changed_ratio = min_changed_ratio
+        self.refresh_interval = refresh_interval
+        self.width = width
+
+        self.passed = 0
+        self.skipped = 0
+        self._previous = None
+        self._last_run = 0.0
+
+    def _thumbnail(self, frame):
+        h, w = frame.shape[:2]
+        height = max(1, int(h * self.width / w))
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (5, 5), 0)
+
+    def changed_ratio(self, thumb):
+        if self._previous is None or self._previous.shape != thumb.shape:
+            return 1.0
+        diff = cv2.absdiff(thumb, self._previous)
+        return np.count_nonzero(diff > self.sensitivity) / diff.size
+
+    def check(self, frame):
+        """
+        True when the detector should run on this frame
+        """
+        thumb = self._thumbnail(frame)
+        ratio = self.changed_ratio(thumb)
+        self._previous = thumb
+
+        now = time.monotonic()
+        if ratio >= self.min_changed_ratio or now - self._last_run >= self.refresh_interval:
+            self._last_run = now
+            self.passed += 1
+            return True
+
+        self.skipped += 1
+        return False
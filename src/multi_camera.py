@@ -0,0 +1,240 @@
+"""
+Multi-camera runner
+One capture thread per source (camera index, RTSP URL or video file),
+all feeding a single shared detector in batches; results are routed
+back to per-source queues with per-camera FPS stats
+"""
+
+import os
+os.environ["ULTRALYTICS_DISABLE_CV2_IMSHOW"] = "1"
+
+import argparse
+import threading
+import time
+
+import cv2
+
+from src.camera_detector import FRAME_SIZE, TrackingAnalyzer, draw_overlays
+from src.frame_pipeline import CaptureThread, DropOldestQueue, LatencyStats, StageStats
+from src.inference import detect_batch
+from src.motion_detector import MotionGate
+
+
+def parse_source(source):
+    """
+    "0" -> camera index 0, anything else is a URL / file path
+    """
+    return int(source) if isinstance(source, str) and source.isdigit() else source
+
+
+class CameraChannel:
+    """
+    Per-source state: capture thread, tracker and output queue
+    """
+
+    def __init__(self, index, source, size=FRAME_SIZE, motion_gate=True):
+        self.index = index
+        self.source = source
+        self.capture = CaptureThread(source, size=size, name=f"capture-{index}")
+        self.analyzer = TrackingAnalyzer(motion_gate=MotionGate() if motion_gate else None)
+        self.results = DropOldestQueue(maxsize=2)
+        self.stats = StageStats(f"cam{index}")
+        self.latency = LatencyStats()
+
+    @property
+    def finished(self):
+        return self.capture.is_done()
+
+
+class MultiCameraRunner:
+    """
+    Gathers the newest frame from every source, runs one detect_batch
+    over them and hands each source its own tracked overlays.
+    An exception stops the detector thread and is kept in ``error``.
+    """
+
+    def __init__(self, sources, max_batch=None, max_wait_ms=10.0, size=FRAME_SIZE,
+                 motion_gate=True, detector=detect_batch):
+        self.channels = [
+            CameraChannel(i, parse_source(src), size=size, motion_gate=motion_gate)
+            for i, src in enumerate(sources)
+        ]
+        self.max_batch = max_batch or len(self.channels)
+        self.max_wait = max_wait_ms / 1000.0
+        self.detector = detector
+        self.batch_stats = StageStats("detector")
+        self.batch_sizes = []
+        self.error = None
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="multi-camera-detector", daemon=True)
+
+    def start(self):
+        for ch in self.channels:
+            if not ch.capture.is_opened():
+                raise RuntimeError(f"❌ Source not opened: {ch.source}")
+            ch.capture.start()
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        for ch in self.channels:
+            ch.capture.stop()
+        self._thread.join(timeout=5)
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    @property
+    def finished(self):
+        return all(ch.finished for ch in self.channels)
+
+    def _gather(self):
+        """
+        Newest frame per source; once one frame is in, wait up to
+        max_wait for the other sources so they share the batch
+        """
+        pending = {}
+        deadline = None
+
+        while len(pending) < len(self.channels):
+            for ch in self.channels:
+                if ch.index in pending:
+                    continue
+                item = ch.capture.out.get(timeout=0)
+                if item is not None:
+                    pending[ch.index] = (ch, item)
+
+            if not pending or len(pending) == len(self.channels):
+                break
+            if deadline is None:
+                deadline = time.perf_counter() + self.max_wait
+            if time.perf_counter() >= deadline:
+                break
+            time.sleep(0.001)
+
+        return list(pending.values())
+
+    def _run(self):
+        try:
+            self._loop()
+        except Exception as e:
+            self.error = e
+            print(f"[ERROR] Detector thread failed: {e!r}")
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            pending = self._gather()
+            if not pending:
+                if self.finished:
+                    return
+                time.sleep(0.002)
+                continue
+
+            to_detect = []
+            for ch, (_, captured_at, frame) in pending:
+                if ch.analyzer.wants_detection(frame):
+                    to_detect.append((ch, captured_at, frame))
+                else:
+                    self._emit(ch, captured_at, frame, ch.analyzer.last_overlays)
+
+            for start in range(0, len(to_detect), self.max_batch):
+                chunk = to_detect[start:start + self.max_batch]
+                detections = self.detector([frame for _, _, frame in chunk])
+                self.batch_stats.tick()
+                self.batch_sizes.append(len(chunk))
+
+                for (ch, captured_at, frame), dets in zip(chunk, detections):
+                    self._emit(ch, captured_at, frame, ch.analyzer.process(frame, dets))
+
+    def _emit(self, ch, captured_at, frame, overlays):
+        ch.results.put((captured_at, frame, overlays))
+        ch.stats.tick()
+        ch.latency.record(captured_at)
+
+    def report(self):
+        lines = []
+        for ch in self.channels:
+            lat = ch.latency.summary()
+            lines.append(
+                f"cam{ch.index} [{ch.source}]: capture {ch.capture.stats.fps:.1f} fps, "
+                f"processed {ch.stats.fps:.1f} fps ({ch.stats.count} frames), "
+                f"latency {lat['mean_ms']:.0f} ms"
+            )
+        if self.batch_sizes:
+            avg = sum(self.batch_sizes) / len(self.batch_sizes)
+            lines.append(f"detector: {self.batch_stats.fps:.1f} batches/s, avg batch {avg:.1f}")
+        return lines
+
+
+def run_multi_camera(sources, headless=False, duration=None, max_batch=None,
+                     motion_gate=True, stats_interval=5.0):
+    runner = MultiCameraRunner(sources, max_batch=max_batch, motion_gate=motion_gate)
+
+    print(f"[INFO] Starting {len(runner.channels)} sources...")
+    time.sleep(2)
+    runner.start()
+
+    started = time.perf_counter()
+    last_report = started
+
+    try:
+        while not runner.finished and runner.is_alive():
+            if duration is not None and time.perf_counter() - started >= duration:
+                break
+
+            for ch in runner.channels:
+                item = ch.results.get(timeout=0)
+                if item is None or headless:
+                    continue
+                _, frame, overlays = item
+                draw_overlays(frame, overlays)
+                cv2.imshow(f"Camera {ch.index}: {ch.source}", frame)
+
+            if not headless and cv2.waitKey(1) & 0xFF == 27:
+                break
+            if headless:
+                time.sleep(0.01)
+
+            if time.perf_counter() - last_report >= stats_interval:
+                for line in runner.report():
+                    print(f"[STATS] {line}")
+                last_report = time.perf_counter()
+    finally:
+        runner.stop()
+        if not headless:
+            cv2.destroyAllWindows()
+
+    for line in runner.report():
+        print(f"[STATS] {line}")
+
+    if runner.error is not None:
+        raise runner.error
+
+    return runner
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run several cameras on one shared detector')
+    parser.add_argument('sources', nargs='+',
+                        help='Camera indices, RTSP URLs or video files')
+    parser.add_argument('--headless', action='store_true',
+                        help='Do not open display windows')
+    parser.add_argument('--duration', type=float, default=None,
+                        help='Stop after this many seconds')
+    parser.add_argument('--max-batch', type=int, default=None,
+                        help='Maximum frames per detector batch (default: number of sources)')
+    parser.add_argument('--no-motion-gate', action='store_true',
+                        help='Run the detector on every frame')
+
+    args = parser.parse_args()
+    run_multi_camera(
+        args.sources,
+        headless=args.headless,
+        duration=args.duration,
+        max_batch=args.max_batch,
+        motion_gate=not args.no_motion_gate
+    )
+
+
+if __name__ == '__main__':
+    main()
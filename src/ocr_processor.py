@@ -1,17 +1,54 @@
-import easyocr
+import os
+import threading
+
 import cv2
+import numpy as np
 import re
 
-# Initialize OCR reader once
-reader = easyocr.Reader(['en'], gpu=False)
+_reader = None
+_reader_lock = threading.Lock()
+
+# easyocr readers are not safe to call from several threads at once
+_ocr_lock = threading.Lock()
+
+# Plate crop OCR mode:
+#   "full"      - easyocr text detection (CRAFT) + recognition
+#   "recognize" - treat each crop as one text line and run only the recognizer
+#                 (faster, but two-line plates read worse)
+PLATE_OCR_MODE = os.environ.get("PLATE_OCR_MODE", "full")
+
+ALLOWLIST = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+
+
+def get_reader():
+    """
+    Create the OCR reader on first use (thread-safe)
+    """
+    global _reader
+
+    if _reader is None:
+        with _reader_lock:
+            if _reader is None:
+                import easyocr
+                _reader = easyocr.Reader(['en'], gpu=False)
+
+    return _reader
+
+
+def warmup():
+    """
+    Run a synthetic plate through text detection and recognition
+    """
+    img = np.full((60, 260, 3), 255, dtype=np.uint8)
+    cv2.putText(img, "MH12AB1234", (8, 42), cv2.FONT_HERSHEY_SIMPLEX, 1.1, (0, 0, 0), 2)
+    extract_text(img)
+    extract_plate_texts([img])
 
 # Strict Indian plate format: AA00AA0000
 PLATE_PATTERN = re.compile(r'[A-Z]{2}[0-9]{2}[A-Z]{2}[0-9]{4}')
 
-def extract_text(image):
-    if image is None or image.size == 0:
-        return "UNKNOWN"
 
+def preprocess_plate(image):
     # 1️⃣ Resize (very important for OCR)
     image = cv2.resize(
         image, None,
@@ -34,13 +71,10 @@ def extract_text(image):
     kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
     gray = cv2.morphologyEx(gray, cv2.MORPH_CLOSE, kernel)
 
-    # 5️⃣ OCR
-    results = reader.readtext(
-        gray,
-        allowlist="ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789",
-        detail=0
-    )
+    return gray
 
+
+def match_plate(results):
     if not results:
         return "UNKNOWN"
 
@@ -73,3 +107,77 @@ def extract_text(image):
 
     # ❌ Do not return noisy / partial text
     return "UNKNOWN"
+
+
+def extract_text(image):
+    if image is None or image.size == 0:
+        return "UNKNOWN"
+
+    gray = preprocess_plate(image)
+
+    # 5️⃣ OCR
+    reader = get_reader()
+    with _ocr_lock:
+        results = reader.readtext(
+            gray,
+            allowlist=ALLOWLIST,
+            detail=0
+        )
+
+    return match_plate(results)
+
+
+def extract_plate_texts(images):
+    """
+    Recognition-only OCR for a batch of plate crops.
+    Skips easyocr's text detector: every crop is one text line and all
+    of them go through the recognizer as a single batch. Reader.recognize
+    would run its boxes one by one on CPU, so the batch is built with
+    easyocr's own helpers and passed to get_text directly.
+    """
+    texts = ["UNKNOWN"] * len(images)
+
+    import easyocr.easyocr
+    from easyocr.recognition import get_text
+    from easyocr.utils import get_image_list
+
+    model_height = easyocr.easyocr.imgH
+    image_list, owners, max_width = [], [], model_height
+    for i, image in enumerate(images):
+        if image is None or image.size == 0:
+            continue
+        gray = preprocess_plate(image)
+        h, w = gray.shape
+        # Same resize / padding as Reader.recognize applies to one box
+        crop_list, width = get_image_list([[0, w, 0, h]], [], gray, model_height=model_height)
+        if crop_list:
+            image_list += crop_list
+            owners.append(i)
+            max_width = max(max_width, width)
+
+    if not image_list:
+        return texts
+
+    reader = get_reader()
+    ignore_char = "".join(set(reader.character) - set(ALLOWLIST))
+    with _ocr_lock:
+        results = get_text(
+            reader.character, model_height, int(max_width), reader.recognizer, reader.converter,
+            image_list, ignore_char=ignore_char, batch_size=len(image_list), workers=0,
+            device=reader.device
+        )
+
+    # One result per crop, in image_list order
+    for owner, (_, text, _) in zip(owners, results):
+        texts[owner] = match_plate([text])
+
+    return texts
+
+
+def extract_plate_text(image):
+    """
+    OCR a cropped number plate using PLATE_OCR_MODE
+    """
+    if PLATE_OCR_MODE == "recognize":
+        return extract_plate_texts([image])[0]
+    return extract_text(image)
@@ -0,0 +1,84 @@
+"""
+On-demand request profiling
+Admins can profile a single /detect request by sending ``X-Profile: 1``
+(or ``?profile=1``) together with ``X-Admin-Token``. The request then runs
+under cProfile and the stats are stored as outputs/profiles/<request_id>.prof
+(open with snakeviz or ``python -m pstats``) with a text summary next to it.
+Requests without the flag skip all of this.
+"""
+
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import re
+import threading
+import time
+import uuid
+
+# Profiling is disabled unless a token is configured
+PROFILE_ADMIN_TOKEN = os.environ.get("PROFILE_ADMIN_TOKEN") or None
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "outputs/profiles")
+PROFILE_SUMMARY_LINES = 40
+
+_REQUEST_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# Only one cProfile can be active per process on Python 3.12+
+_profile_lock = threading.Lock()
+
+
+def requested(headers, args):
+    return headers.get("X-Profile") == "1" or args.get("profile") == "1"
+
+
+def is_admin(headers):
+    token = headers.get("X-Admin-Token")
+    if PROFILE_ADMIN_TOKEN is None or token is None:
+        return False
+    return hmac.compare_digest(token.encode(), PROFILE_ADMIN_TOKEN.encode())
+
+
+def request_id(headers):
+    """
+    Client-supplied X-Request-ID if it is safe to use as a file name
+    """
+    rid = headers.get("X-Request-ID")
+    if rid and _REQUEST_ID.match(rid):
+        return rid
+    return uuid.uuid4().hex
+
+
+def profile_path(rid):
+    if not _REQUEST_ID.match(rid):
+        return None
+    return os.path.join(PROFILE_DIR, f"{rid}.prof")
+
+
+def profile_call(rid, fn, *args):
+    """
+    Run fn(*args) under cProfile on the calling thread.
+    Returns (result, profile path, wall time in ms).
+    """
+    profiler = cProfile.Profile()
+    with _profile_lock:
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            result = fn(*args)
+        finally:
+            profiler.disable()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = profile_path(rid)
+    profiler.dump_stats(path)
+
+    summary = io.StringIO()
+    summary.write(f"request {rid}: {elapsed_ms:.1f} ms\n\n")
+    pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(PROFILE_SUMMARY_LINES)
+    with open(path[:-len(".prof")] + ".txt", "w") as f:
+        f.write(summary.getvalue())
+
+    print(f"[INFO] Profiled request {rid} ({elapsed_ms:.0f} ms) -> {path}")
+    return result, path, elapsed_ms
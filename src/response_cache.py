@@ -0,0 +1,196 @@
+"""
+Response cache
+Caches complete /detect responses keyed by the SHA-256 of the uploaded
+bytes plus the model / pipeline version, so retried uploads are answered
+without decoding, detection or OCR. Memory tier is an LRU bounded by bytes
+and TTL; an optional on-disk tier survives restarts.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from src import image_io, inference, ocr_processor
+
+RESPONSE_CACHE_MB = float(os.environ.get("RESPONSE_CACHE_MB", 64))
+RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", 600))
+RESPONSE_CACHE_DIR = os.environ.get("RESPONSE_CACHE_DIR") or None
+
+# Expired disk entries are swept every this many writes
+_PRUNE_EVERY = 256
+
+
+def pipeline_version():
+    """
+    Everything besides the image bytes that changes a /detect response
+    """
+    return "|".join([
+        inference.model_version(),
+        ocr_processor.PLATE_OCR_MODE,
+        str(image_io.DECODE_MIN_SIDE),
+        str(image_io.PLATE_MIN_WIDTH)
+    ])
+
+
+class ResponseCache:
+    """
+    Thread-safe cache of (status, JSON body bytes) per upload.
+    max_bytes <= 0 disables the memory tier; disk_dir=None disables disk.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttl=600.0, disk_dir=None, version=None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        self.hits = 0
+        self.misses = 0
+        self._version = version
+        self._entries = OrderedDict()   # key -> (expires_at, status, body)
+        self._bytes = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0 or bool(self.disk_dir)
+
+    @property
+    def version(self):
+        # Resolved on first use; the model is only loaded once per process
+        if self._version is None:
+            self._version = pipeline_version()
+        return self._version
+
+    def key(self, img_bytes):
+        digest = hashlib.sha256(img_bytes)
+        digest.update(self.version.encode())
+        return digest.hexdigest()
+
+    # -----------------------------
+    # Lookup
+    # -----------------------------
+    def get(self, key):
+        """
+        (status, body bytes) or None
+        """
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1], entry[2]
+                self._evict(key)
+
+        entry = self._disk_get(key, now)
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, *entry)
+            return entry[1], entry[2]
+
+    def put(self, key, status, response):
+        body = json.dumps(response).encode()
+        expires_at = time.time() + self.ttl
+
+        with self._lock:
+            self._remember(key, expires_at, status, body)
+            self._writes += 1
+            prune = self._writes % _PRUNE_EVERY == 0
+
+        self._disk_put(key, expires_at, status, body)
+        if prune:
+            self.prune_disk()
+        return body
+
+    def _remember(self, key, expires_at, status, body):
+        if len(body) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._evict(key)
+        self._entries[key] = (expires_at, status, body)
+        self._bytes += len(body)
+        while self._bytes > self.max_bytes:
+            self._evict(next(iter(self._entries)))
+
+    def _evict(self, key):
+        _, _, body = self._entries.pop(key)
+        self._bytes -= len(body)
+
+    # -----------------------------
+    # Disk tier
+    # -----------------------------
+    def _path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _disk_get(self, key, now):
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                header, body = f.read().split(b"\n", 1)
+            expires_at, status = header.split(b" ")
+            expires_at, status = float(expires_at), int(status)
+        except (OSError, ValueError):
+            return None
+
+        if expires_at <= now:
+            return None
+        return expires_at, status, body
+
+    def _disk_put(self, key, expires_at, status, body):
+        if not self.disk_dir:
+            return
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(f"{expires_at} {status}\n".encode() + body)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[WARN] Response cache write failed: {e}")
+
+    def prune_disk(self):
+        """
+        Delete expired disk entries
+        """
+        if not self.disk_dir:
+            return
+        now = time.time()
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith(".json"):
+                continue
+            if self._disk_get(name[:-5], now) is None:
+                try:
+                    os.remove(os.path.join(self.disk_dir, name))
+                except OSError:
+                    pass
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._entries),
+                "bytes": self._bytes
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
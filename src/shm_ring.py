@@ -0,0 +1,308 @@
+"""
+Shared-memory frame ring
+Fixed-size ring of frames in multiprocessing.shared_memory so a capture
+process can hand frames to an inference process without pickling.
+
+Each slot has a sequence number written before (odd = being written)
+and after (even) the frame data, seqlock style; readers use it to detect
+frames that were overwritten while they were reading them. The (single)
+reader publishes the slot it is holding and the writer never reuses it,
+so a slow consumer only misses newer frames instead of losing the one
+it is working on.
+"""
+
+import multiprocessing as mp
+import os
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+_RING_FIELDS = 3     # [last published frame number, its slot, slot held by the reader]
+_HEADER_FIELDS = 2   # per slot: [sequence, captured_at_ns]
+
+# Seconds to wait for the capture process to open its source
+OPEN_TIMEOUT = 30.0
+
+
+class FrameOverrun(Exception):
+    """
+    The slot was overwritten by the writer while it was being read
+    """
+
+
+class SharedFrameRing:
+    """
+    Ring of `slots` frames of fixed `shape` (H, W, C) uint8.
+    Create with create=True in the owner process, attach by name elsewhere.
+    """
+
+    def __init__(self, name=None, slots=8, shape=(540, 960, 3), create=False):
+        self.slots = slots
+        self.shape = tuple(shape)
+        frame_bytes = int(np.prod(self.shape))
+        if slots < 3:
+            raise ValueError("slots must be >= 3")
+        header_bytes = (_RING_FIELDS + slots * _HEADER_FIELDS) * 8
+        size = header_bytes + slots * frame_bytes
+
+        self._shm = shared_memory.SharedMemory(name=name, create=create, size=size if create else 0)
+        self.name = self._shm.name
+        self._owner = create
+
+        self._header = np.ndarray((_RING_FIELDS + slots * _HEADER_FIELDS,), dtype=np.int64, buffer=self._shm.buf)
+        self._slot_header = self._header[_RING_FIELDS:].reshape(slots, _HEADER_FIELDS)
+        self._frames = np.ndarray(
+            (slots,) + self.shape, dtype=np.uint8,
+            buffer=self._shm.buf, offset=header_bytes
+        )
+
+        if create:
+            self._header[:] = 0
+            self._header[:_RING_FIELDS] = -1
+
+        self._write_slot = -1
+        self._held = None   # (frame_no, slot) on the reader side
+
+    # -----------------------------
+    # Writer side
+    # -----------------------------
+    def slot_view(self, frame_no):
+        """
+        Preallocated array to decode / resize the next frame into
+        (call begin_write first)
+        """
+        return self._frames[self._write_slot]
+
+    def begin_write(self, frame_no):
+        # Skip the slot the reader holds and the newest frame, which the
+        # reader may be about to pick up
+        busy = (self._header[1], self._header[2])
+        slot = self._write_slot
+        for _ in range(self.slots):
+            slot = (slot + 1) % self.slots
+            if slot not in busy:
+                break
+        self._write_slot = slot
+        self._slot_header[slot, 0] = 2 * frame_no + 1
+
+    def publish(self, frame_no, captured_at_ns=None):
+        slot = self._write_slot
+        self._slot_header[slot, 1] = captured_at_ns if captured_at_ns is not None else time.time_ns()
+        self._slot_header[slot, 0] = 2 * frame_no + 2
+        self._header[1] = slot
+        self._header[0] = frame_no
+
+    def write(self, frame_no, frame):
+        self.begin_write(frame_no)
+        np.copyto(self.slot_view(frame_no), frame)
+        self.publish(frame_no)
+
+    # -----------------------------
+    # Reader side
+    # -----------------------------
+    @property
+    def latest(self):
+        return int(self._header[0])
+
+    def _find(self, frame_no):
+        if self._header[0] == frame_no:
+            slot = int(self._header[1])
+            if self._slot_header[slot, 0] == 2 * frame_no + 2:
+                return slot
+        for slot in range(self.slots):
+            if self._slot_header[slot, 0] == 2 * frame_no + 2:
+                return slot
+        return None
+
+    def read(self, frame_no):
+        """
+        Zero-copy view of frame_no plus its capture time (ns). The slot
+        stays reserved for the reader until the next read() or release().
+        Call check(frame_no) once done with the view to confirm it
+        was not overwritten meanwhile.
+        """
+        slot = self._find(frame_no)
+        if slot is None:
+            raise FrameOverrun(f"frame {frame_no} is no longer in the ring")
+
+        self._header[2] = slot
+        self._held = (frame_no, slot)
+        # The writer may have started on the slot before it saw the reservation
+        if self._slot_header[slot, 0] != 2 * frame_no + 2:
+            self.release()
+            raise FrameOverrun(f"frame {frame_no} is no longer in the ring")
+        return self._frames[slot], int(self._slot_header[slot, 1])
+
+    def check(self, frame_no):
+        slot = self._held[1] if self._held is not None and self._held[0] == frame_no else self._find(frame_no)
+        if slot is None or self._slot_header[slot, 0] != 2 * frame_no + 2:
+            raise FrameOverrun(f"frame {frame_no} was overwritten while in use")
+
+    def release(self):
+        self._header[2] = -1
+        self._held = None
+
+    def close(self):
+        # Drop numpy views before closing the mapping
+        del self._header, self._slot_header, self._frames
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+def _capture_main(ring_name, slots, shape, source, stop_event, opened):
+    ring = SharedFrameRing(ring_name, slots=slots, shape=shape)
+    cap = cv2.VideoCapture(source)
+    # 1 = opened, -1 = failed; the parent waits on this in is_opened()
+    opened.value = 1 if cap.isOpened() else -1
+    height, width = shape[:2]
+    frame_no = 0
+
+    # Pace video files to their native FPS, like CaptureThread
+    fps = cap.get(cv2.CAP_PROP_FPS) if isinstance(source, str) and os.path.isfile(source) else 0
+    interval = 1.0 / fps if fps and fps > 0 else 0.0
+    next_at = time.perf_counter()
+
+    try:
+        while not stop_event.is_set():
+            if interval:
+                next_at += interval
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            ring.begin_write(frame_no)
+            # Resize straight into the shared slot, no intermediate copy
+            cv2.resize(frame, (width, height), dst=ring.slot_view(frame_no))
+            ring.publish(frame_no)
+            frame_no += 1
+    finally:
+        cap.release()
+        ring.close()
+        stop_event.set()
+
+
+class RingStats:
+    """
+    Capture FPS measured from the ring's frame numbers, since the
+    capture loop itself runs in another process
+    """
+
+    def __init__(self, ring, name="capture"):
+        self.name = name
+        self._ring = ring
+        self._started = None
+
+    @property
+    def count(self):
+        return self._ring.latest + 1
+
+    @property
+    def fps(self):
+        now = time.perf_counter()
+        if self._started is None:
+            self._started = (now, self.count)
+            return 0.0
+        t0, n0 = self._started
+        return (self.count - n0) / (now - t0) if now > t0 else 0.0
+
+
+class SharedMemoryCapture:
+    """
+    Runs capture in a separate process writing into a SharedFrameRing.
+    Drop-in for CaptureThread in the camera pipeline: `out.get()` returns
+    the newest frame as (seq, captured_at, frame) and skips anything older.
+    Frames are zero-copy views into shared memory; the writer leaves the
+    last returned frame alone until the next get(). Copy a frame, then
+    call check(seq) to make sure the copy (and anything computed from the
+    view) was not torn by the writer.
+    """
+
+    def __init__(self, source=0, shape=(540, 960, 3), slots=8):
+        self.source = source
+        self.ring = SharedFrameRing(slots=slots, shape=shape, create=True)
+        self.out = self
+        self.stats = RingStats(self.ring)
+        self.overruns = 0
+        self._next = 0
+        self._ctx = mp.get_context("spawn")
+        self._stop = self._ctx.Event()
+        self._opened = self._ctx.Value("b", 0)
+        self._process = self._ctx.Process(
+            target=_capture_main,
+            args=(self.ring.name, slots, shape, source, self._stop, self._opened),
+            name="shm-capture",
+            daemon=True
+        )
+
+    def start(self):
+        # is_opened() may already have started the process
+        if self._process.pid is None:
+            self._process.start()
+
+    def is_opened(self, timeout=OPEN_TIMEOUT):
+        """
+        Starts the capture process if needed and waits until it reports
+        whether the source could be opened
+        """
+        self.start()
+        deadline = time.monotonic() + timeout
+        while self._opened.value == 0 and self._process.is_alive() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self._opened.value == 1
+
+    @property
+    def stopped(self):
+        return self._stop.is_set() or not self._process.is_alive()
+
+    def is_done(self):
+        return self.stopped and self.ring.latest < self._next
+
+    def get(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            latest = self.ring.latest
+            if latest >= self._next:
+                try:
+                    frame, captured_ns = self.ring.read(latest)
+                except FrameOverrun:
+                    self.overruns += 1
+                    continue
+                self._next = latest + 1
+                # perf_counter-compatible timestamp for latency stats
+                captured_at = time.perf_counter() - (time.time_ns() - captured_ns) / 1e9
+                return latest, captured_at, frame
+
+            if self.stopped or (deadline is not None and time.monotonic() >= deadline):
+                return None
+            time.sleep(0.001)
+
+    def check(self, seq):
+        """
+        Raise FrameOverrun (and count it) if frame seq was overwritten
+        since get() returned it
+        """
+        try:
+            self.ring.check(seq)
+        except FrameOverrun:
+            self.overruns += 1
+            raise
+
+    def qsize(self):
+        return max(0, self.ring.latest + 1 - self._next)
+
+    def stop(self):
+        self._stop.set()
+
+    def join(self, timeout=None):
+        self._process.join(timeout=timeout)
+
+    def close(self):
+        self.ring.close()
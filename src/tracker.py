@@ -0,0 +1,177 @@
+"""
+Lightweight multi-object tracker
+IoU association with a constant-velocity Kalman filter per track, so
+each vehicle / plate keeps a stable ID across frames on CPU
+"""
+
+import itertools
+from collections import Counter
+
+import cv2
+import numpy as np
+
+
+def iou_matrix(a, b):
+    """
+    Pairwise IoU between two (N, 4) / (M, 4) xyxy arrays
+    """
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)))
+
+    a = np.asarray(a, dtype=np.float64)[:, None, :]
+    b = np.asarray(b, dtype=np.float64)[None, :, :]
+
+    iw = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    ih = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = iw * ih
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    union = area_a + area_b - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+def crop_quality(crop, conf):
+    """
+    Bigger, more confident and sharper crops score higher
+    """
+    if crop is None or crop.size == 0:
+        return 0.0
+    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+    sharpness = min(1.0, cv2.Laplacian(gray, cv2.CV_64F).var() / 100.0)
+    return conf * crop.shape[0] * crop.shape[1] * sharpness
+
+
+class KalmanBox:
+    """
+    Constant-velocity Kalman filter over (cx, cy, w, h)
+    """
+
+    _F = np.eye(8)
+    _F[:4, 4:] = np.eye(4)
+    _H = np.eye(4, 8)
+    _Q = np.diag([1.0, 1.0, 1.0, 1.0, 0.01, 0.01, 0.0001, 0.0001])
+    _R = np.diag([1.0, 1.0, 10.0, 10.0])
+
+    def __init__(self, bbox):
+        self.x = np.zeros(8)
+        self.x[:4] = self._to_z(bbox)
+        self.P = np.diag([10.0, 10.0, 10.0, 10.0, 1e4, 1e4, 1e4, 1e4])
+
+    @staticmethod
+    def _to_z(bbox):
+        x1, y1, x2, y2 = bbox
+        return np.array([(x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1], dtype=np.float64)
+
+    def bbox(self):
+        cx, cy, w, h = self.x[:4]
+        w, h = max(w, 1.0), max(h, 1.0)
+        return [int(cx - w / 2), int(cy - h / 2), int(cx + w / 2), int(cy + h / 2)]
+
+    def predict(self):
+        self.x = self._F @ self.x
+        self.P = self._F @ self.P @ self._F.T + self._Q
+        return self.bbox()
+
+    def update(self, bbox):
+        y = self._to_z(bbox) - self._H @ self.x
+        S = self._H @ self.P @ self._H.T + self._R
+        K = self.P @ self._H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ y
+        self.P = (np.eye(8) - K @ self._H) @ self.P
+
+
+class Track:
+    def __init__(self, track_id, detection):
+        self.id = track_id
+        self.kf = KalmanBox(detection["bbox"])
+        self.bbox = list(detection["bbox"])
+        self.conf = detection["conf"]
+        self.class_votes = Counter({detection["class"]: 1})
+        self.hits = 1
+        self.misses = 0
+
+        # Per-track recognition state, filled in by the caller
+        self.best_quality = 0.0
+        self.attributes = {}
+        self.plate_votes = Counter()
+
+    @property
+    def cls(self):
+        return self.class_votes.most_common(1)[0][0]
+
+    @property
+    def plate_text(self):
+        if not self.plate_votes:
+            return None
+        return self.plate_votes.most_common(1)[0][0]
+
+    def needs_refresh(self, quality, gain=1.2):
+        """
+        True for a new track or when the crop is clearly better than the
+        best one recognised so far; records the new best quality
+        """
+        if self.best_quality == 0.0 or quality > self.best_quality * gain:
+            self.best_quality = quality
+            return True
+        return False
+
+    def vote_plate(self, text):
+        if text and text != "UNKNOWN":
+            self.plate_votes[text] += 1
+
+    def _predict(self):
+        self.predicted = self.kf.predict()
+
+    def _update(self, detection):
+        self.kf.update(detection["bbox"])
+        self.bbox = list(detection["bbox"])
+        self.conf = detection["conf"]
+        self.class_votes[detection["class"]] += 1
+        self.hits += 1
+        self.misses = 0
+
+
+class IoUTracker:
+    """
+    Greedy IoU matching between Kalman-predicted tracks and detections
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, iou_threshold=0.3, max_misses=15, min_hits=2):
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.min_hits = min_hits
+        self.tracks = []
+
+    def update(self, detections):
+        """
+        Returns the confirmed tracks matched in this frame
+        """
+        for t in self.tracks:
+            t._predict()
+
+        ious = iou_matrix([t.predicted for t in self.tracks], [d["bbox"] for d in detections])
+        matched_tracks, matched_dets = set(), set()
+
+        while ious.size:
+            ti, di = np.unravel_index(np.argmax(ious), ious.shape)
+            if ious[ti, di] < self.iou_threshold:
+                break
+            self.tracks[ti]._update(detections[di])
+            matched_tracks.add(ti)
+            matched_dets.add(di)
+            ious[ti, :] = -1
+            ious[:, di] = -1
+
+        for i, t in enumerate(self.tracks):
+            if i not in matched_tracks:
+                t.misses += 1
+
+        self.tracks = [t for t in self.tracks if t.misses <= self.max_misses]
+
+        for i, d in enumerate(detections):
+            if i not in matched_dets:
+                self.tracks.append(Track(next(self._ids), d))
+
+        return [t for t in self.tracks if t.misses == 0 and t.hits >= self.min_hits]
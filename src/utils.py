@@ -7,9 +7,11 @@ import os
 import cv2
 import numpy as np
 from typing import List, Tuple
-import json
 from datetime import datetime
 import shutil
+import time
+
+from src.log_store import DB_PATH, get_store
 
 
 def create_project_directories():
@@ -117,74 +119,50 @@ def save_config(config, config_path='config/config.yaml'):
     print(f"✓ Config saved to: {config_path}")
 
 
-def log_detection(detection_result, log_file='outputs/logs/detections.json'):
+def make_log_entry(detection_result, timestamp=None):
     """
-    Log detection result to file
+    Build a detection log entry from a detection result
     """
-    os.makedirs(os.path.dirname(log_file), exist_ok=True)
-    
-    # Prepare log entry
-    log_entry = {
-        'timestamp': datetime.now().isoformat(),
+    return {
+        'timestamp': timestamp or datetime.now().isoformat(),
         'vehicle_type': detection_result.get('vehicle_type'),
         'sugarcane_detected': detection_result.get('sugarcane_detected'),
         'number_plate_present': detection_result.get('number_plate_present'),
         'number_plate_text': detection_result.get('number_plate_text', 'N/A'),
-        'number_plate_color': detection_result.get('number_plate_color', 'N/A')
+        'number_plate_color': detection_result.get('number_plate_color', 'N/A'),
+        'screenshot': detection_result.get('screenshot')
     }
-    
-    # Load existing logs
-    logs = []
-    if os.path.exists(log_file):
-        with open(log_file, 'r') as f:
-            logs = json.load(f)
-    
-    # Append new log
-    logs.append(log_entry)
-    
-    # Save logs
-    with open(log_file, 'w') as f:
-        json.dump(logs, f, indent=2)
 
 
-def get_detection_statistics(log_file='outputs/logs/detections.json'):
+def log_detection(detection_result, log_file=DB_PATH):
+    """
+    Log detection result to the append-only detection store
+    """
+    get_store(log_file).append(make_log_entry(detection_result, detection_result.get('timestamp')))
+
+
+def log_detections(detection_results, log_file=DB_PATH):
     """
-    Get statistics from detection logs
+    Log several detection results in a single commit
+    """
+    store = get_store(log_file)
+    store.append_many(make_log_entry(r, r.get('timestamp')) for r in detection_results)
+    store.flush()
+
+
+def get_detection_statistics(log_file=DB_PATH, start=None, end=None, vehicle_type=None):
+    """
+    Get statistics from detection logs, optionally for a [start, end)
+    window (epoch seconds) and a single vehicle type
     """
     if not os.path.exists(log_file):
         return None
     
-    with open(log_file, 'r') as f:
-        logs = json.load(f)
+    stats = get_store(log_file).stats(start=start, end=end, vehicle_type=vehicle_type)
     
-    if not logs:
+    if not stats['total_detections']:
         return None
     
-    # Calculate statistics
-    stats = {
-        'total_detections': len(logs),
-        'vehicle_types': {},
-        'sugarcane_count': 0,
-        'plates_detected': 0,
-        'plate_colors': {}
-    }
-    
-    for log in logs:
-        # Vehicle types
-        vehicle_type = log.get('vehicle_type', 'Unknown')
-        stats['vehicle_types'][vehicle_type] = stats['vehicle_types'].get(vehicle_type, 0) + 1
-        
-        # Sugarcane
-        if log.get('sugarcane_detected'):
-            stats['sugarcane_count'] += 1
-        
-        # Plates
-        if log.get('number_plate_present'):
-            stats['plates_detected'] += 1
-            
-            color = log.get('number_plate_color', 'Unknown')
-            stats['plate_colors'][color] = stats['plate_colors'].get(color, 0) + 1
-    
     return stats
 
 
@@ -346,6 +324,8 @@ def main():
                        help='Check project structure')
     parser.add_argument('--stats', action='store_true',
                        help='Show detection statistics')
+    parser.add_argument('--hours', type=float,
+                       help='Limit --stats to the last N hours')
     parser.add_argument('--backup', action='store_true',
                        help='Backup dataset')
     
@@ -358,7 +338,8 @@ def main():
         check_project_structure()
     
     if args.stats:
-        stats = get_detection_statistics()
+        start = time.time() - args.hours * 3600 if args.hours else None
+        stats = get_detection_statistics(start=start)
         print_statistics(stats)
     
     if args.backup:
@@ -371,6 +352,7 @@ def main():
         print("  --create-dirs     Create project directories")
         print("  --check-structure Check project structure")
         print("  --stats          Show detection statistics")
+        print("  --hours N        Limit --stats to the last N hours")
         print("  --backup         Backup dataset")
 
 
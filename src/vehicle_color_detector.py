@@ -29,13 +29,24 @@ def extract_cabin_region(img, vehicle_type):
     return roi if roi.size > 0 else None
 
 
-def detect_vehicle_color(img, vehicle_type):
+COLOR_NAMES = ["Red", "Green", "Blue", "Yellow"]
+
+# Hue -> index into COLOR_NAMES, len(COLOR_NAMES) means "no vote"
+HUE_LUT = np.full(256, len(COLOR_NAMES), dtype=np.intp)
+HUE_LUT[:10] = 0       # Red
+HUE_LUT[166:] = 0      # Red (wraps around)
+HUE_LUT[40:80] = 1     # Green
+HUE_LUT[90:130] = 2    # Blue
+HUE_LUT[15:35] = 3     # Yellow
+
+
+def _valid_pixels(img, vehicle_type):
     if img is None or img.size == 0:
-        return "UNKNOWN"
+        return None
 
     roi = extract_cabin_region(img, vehicle_type)
     if roi is None:
-        return "UNKNOWN"
+        return None
 
     hsv = cv2.cvtColor(roi, cv2.COLOR_BGR2HSV)
     h_ch, s_ch, v_ch = cv2.split(hsv)
@@ -47,8 +58,12 @@ def detect_vehicle_color(img, vehicle_type):
     v_ch = v_ch[valid]
 
     if h_ch.size < 120:
-        return "UNKNOWN"
+        return None
+
+    return h_ch, s_ch, v_ch
 
+
+def _achromatic(s_ch, v_ch):
     # =====================
     # STRONG WHITE
     # =====================
@@ -61,28 +76,77 @@ def detect_vehicle_color(img, vehicle_type):
     if np.mean(v_ch) < 80:
         return "Black"
 
+    return None
+
+
+def _hue_codes(h_ch, s_ch):
+    return HUE_LUT[h_ch[s_ch >= 45]]
+
+
+def _pick_color(votes):
+    # argmax keeps the first colour on ties, like max() over the dict did
+    dominant = int(np.argmax(votes))
+    total = int(votes.sum())
+
+    if total == 0 or votes[dominant] / total < 0.40:
+        return "UNKNOWN"
+
+    return COLOR_NAMES[dominant]
+
+
+def detect_vehicle_color(img, vehicle_type):
+    pixels = _valid_pixels(img, vehicle_type)
+    if pixels is None:
+        return "UNKNOWN"
+
+    h_ch, s_ch, v_ch = pixels
+
+    color = _achromatic(s_ch, v_ch)
+    if color is not None:
+        return color
+
     # =====================
     # COLOR VOTING
     # =====================
-    votes = {"Red": 0, "Green": 0, "Blue": 0, "Yellow": 0}
+    votes = np.bincount(_hue_codes(h_ch, s_ch), minlength=len(COLOR_NAMES) + 1)
+    return _pick_color(votes[:len(COLOR_NAMES)])
 
-    for h, s in zip(h_ch, s_ch):
-        if s < 45:
-            continue
 
-        if h < 10 or h > 165:
-            votes["Red"] += 1
-        elif 15 <= h < 35:
-            votes["Yellow"] += 1
-        elif 40 <= h < 80:
-            votes["Green"] += 1
-        elif 90 <= h < 130:
-            votes["Blue"] += 1
+def _classify(img, vehicle_type):
+    """
+    Same decision as detect_vehicle_color, computed with OpenCV masks and
+    a hue histogram instead of boolean-indexed pixel copies
+    """
+    if img is None or img.size == 0:
+        return "UNKNOWN"
+
+    roi = extract_cabin_region(img, vehicle_type)
+    if roi is None:
+        return "UNKNOWN"
 
-    dominant = max(votes, key=votes.get)
-    total = sum(votes.values())
+    hsv = cv2.cvtColor(roi, cv2.COLOR_BGR2HSV)
 
-    if total == 0 or votes[dominant] / total < 0.40:
+    # Remove shadows + glare: 70 < V < 230
+    valid = cv2.inRange(hsv, (0, 0, 71), (255, 255, 229))
+    if cv2.countNonZero(valid) < 120:
         return "UNKNOWN"
 
-    return dominant
+    _, mean_s, mean_v, _ = cv2.mean(hsv, mask=valid)
+    if mean_s < 35 and mean_v > 170:
+        return "White"
+    if mean_v < 80:
+        return "Black"
+
+    saturated = cv2.inRange(hsv, (0, 45, 71), (255, 255, 229))
+    hist = cv2.calcHist([hsv], [0], saturated, [256], [0, 256]).ravel()
+    votes = np.bincount(HUE_LUT, weights=hist, minlength=len(COLOR_NAMES) + 1)
+    return _pick_color(votes[:len(COLOR_NAMES)])
+
+
+def detect_vehicle_colors(items):
+    """
+    Classify many (vehicle_img, vehicle_type) crops at once.
+    Each crop is reduced to a 256-bin hue histogram in OpenCV, so no
+    per-pixel arrays are built or concatenated across crops.
+    """
+    return [_classify(img, vehicle_type) for img, vehicle_type in items]
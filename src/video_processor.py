@@ -0,0 +1,268 @@
+"""
+Offline video processor
+Headless batch processing of recorded footage: frames are decoded in a
+background thread, run through the detector in batches and analysed with
+the same vehicle / plate / load logic as the API, streaming one record
+per processed frame to CSV or JSONL
+"""
+
+import argparse
+import csv
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+from src.analyzer import analyze
+from src.inference import detect_batch
+
+OUTPUT_DIR = "outputs/video"
+
+FIELDS = [
+    "video", "frame", "time_s",
+    "vehicle_detected", "vehicle_type", "vehicle_color",
+    "load_status", "number_plate", "plate_color"
+]
+
+_END = object()
+
+
+class FrameReader(threading.Thread):
+    """
+    Decodes every stride-th frame into a bounded queue.
+    Blocks when the queue is full: offline processing must not drop frames.
+    stop() releases it when the consumer gives up early.
+    """
+
+    def __init__(self, path, stride=1, maxsize=64):
+        super().__init__(name="video-decode", daemon=True)
+        self.path = path
+        self.stride = max(1, stride)
+        self.frames = queue.Queue(maxsize=maxsize)
+        self.fps = 0.0
+        self.error = None
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _put(self, item):
+        while not self._stop_event.is_set():
+            try:
+                self.frames.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run(self):
+        cap = cv2.VideoCapture(self.path)
+        try:
+            if not cap.isOpened():
+                self.error = f"Cannot open video: {self.path}"
+                return
+
+            self.fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+            index = 0
+            while True:
+                if index % self.stride:
+                    # grab() skips decoding frames we do not need
+                    if not cap.grab():
+                        break
+                else:
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    if not self._put((index, frame)):
+                        break
+                index += 1
+        finally:
+            cap.release()
+            self._put(_END)
+
+
+class RecordWriter:
+    """
+    Streams records to .jsonl or .csv
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.format = "csv" if path.endswith(".csv") else "jsonl"
+        self._file = open(path, "w", newline="" if self.format == "csv" else None)
+        self._csv = None
+        if self.format == "csv":
+            self._csv = csv.DictWriter(self._file, fieldnames=FIELDS)
+            self._csv.writeheader()
+
+    def write(self, record):
+        if self._csv is not None:
+            self._csv.writerow(record)
+        else:
+            self._file.write(json.dumps(record) + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+def process_video(path, out_path, stride=1, batch_size=8, plate_only_ocr=False):
+    """
+    Process one video file; returns a summary dict
+    """
+    reader = FrameReader(path, stride=stride)
+    reader.start()
+    writer = RecordWriter(out_path)
+
+    processed = 0
+    started = time.perf_counter()
+    done = False
+
+    try:
+        while not done:
+            batch = []
+            while len(batch) < batch_size:
+                item = reader.frames.get()
+                if item is _END:
+                    done = True
+                    break
+                batch.append(item)
+
+            if not batch:
+                break
+
+            detections = detect_batch([frame for _, frame in batch])
+            for (index, frame), dets in zip(batch, detections):
+                response = analyze(frame, dets, plate_only_ocr=plate_only_ocr)
+                writer.write(dict(
+                    video=os.path.basename(path),
+                    frame=index,
+                    time_s=round(index / reader.fps, 3) if reader.fps else None,
+                    **response
+                ))
+            processed += len(batch)
+    finally:
+        writer.close()
+        # If detection failed the reader may be blocked on a full queue
+        reader.stop()
+        reader.join()
+
+    if reader.error:
+        raise RuntimeError(reader.error)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "video": path,
+        "output": out_path,
+        "frames": processed,
+        "seconds": round(elapsed, 2),
+        "fps": round(processed / elapsed, 2) if elapsed > 0 else 0.0
+    }
+
+
+def output_paths(videos, out_dir=OUTPUT_DIR, fmt="jsonl"):
+    """
+    One result path per video. Files sharing a name (day1/gate.mp4,
+    day2/gate.mp4) are prefixed with the directories that tell them apart.
+    """
+    stems = [os.path.splitext(os.path.basename(v))[0] for v in videos]
+    names = []
+    for video, stem in zip(videos, stems):
+        if stems.count(stem) > 1:
+            twins = [os.path.dirname(os.path.abspath(v)) for v, s in zip(videos, stems) if s == stem]
+            rel = os.path.relpath(os.path.dirname(os.path.abspath(video)), os.path.commonpath(twins))
+            if rel != ".":
+                stem = rel.replace(os.sep, "_") + "_" + stem
+        names.append(stem)
+
+    # Anything still equal (e.g. the same file listed twice) gets a counter
+    paths, used = [], set()
+    for name in names:
+        candidate, n = name, 0
+        while candidate in used:
+            n += 1
+            candidate = f"{name}_{n}"
+        used.add(candidate)
+        paths.append(os.path.join(out_dir, f"{candidate}.{fmt}"))
+    return paths
+
+
+def _init_worker(threads):
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def _process_job(job):
+    return process_video(**job)
+
+
+def process_videos(videos, out_dir=OUTPUT_DIR, fmt="jsonl", stride=1, batch_size=8,
+                   procs=1, plate_only_ocr=False):
+    """
+    Process several files, spreading them over procs worker processes
+    """
+    jobs = [
+        dict(path=v, out_path=out_path, stride=stride,
+             batch_size=batch_size, plate_only_ocr=plate_only_ocr)
+        for v, out_path in zip(videos, output_paths(videos, out_dir, fmt))
+    ]
+
+    if procs <= 1 or len(jobs) == 1:
+        return [_process_job(job) for job in jobs]
+
+    procs = min(procs, len(jobs))
+    threads = max(1, (os.cpu_count() or 1) // procs)
+    with ProcessPoolExecutor(max_workers=procs, initializer=_init_worker, initargs=(threads,)) as pool:
+        return list(pool.map(_process_job, jobs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Process recorded videos without a display')
+    parser.add_argument('videos', nargs='+', help='Video files to process')
+    parser.add_argument('--out-dir', default=OUTPUT_DIR,
+                        help='Directory for the per-video result files')
+    parser.add_argument('--format', choices=['jsonl', 'csv'], default='jsonl',
+                        help='Result file format')
+    parser.add_argument('--stride', type=int, default=1,
+                        help='Process every N-th frame')
+    parser.add_argument('--batch', type=int, default=8,
+                        help='Frames per detector batch')
+    parser.add_argument('--procs', type=int, default=1,
+                        help='Worker processes for multi-file runs')
+    parser.add_argument('--plate-only-ocr', action='store_true',
+                        help='Run whole-frame OCR on frames without a vehicle')
+
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    summaries = process_videos(
+        args.videos,
+        out_dir=args.out_dir,
+        fmt=args.format,
+        stride=args.stride,
+        batch_size=args.batch,
+        procs=args.procs,
+        plate_only_ocr=args.plate_only_ocr
+    )
+    elapsed = time.perf_counter() - started
+
+    total = 0
+    for s in summaries:
+        total += s["frames"]
+        print(f"✓ {s['video']}: {s['frames']} frames in {s['seconds']}s "
+              f"({s['fps']} fps) -> {s['output']}")
+
+    if len(summaries) > 1 and elapsed > 0:
+        print(f"\nTotal: {total} frames in {elapsed:.1f}s ({total / elapsed:.1f} fps)")
+
+
+if __name__ == '__main__':
+    main()
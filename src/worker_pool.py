@@ -0,0 +1,281 @@
+"""
+Multi-process inference worker pool
+Each worker process owns its own detector and OCR replicas, is pinned to
+a slice of CPU cores and pulls requests from a shared task queue
+"""
+
+import itertools
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+# Seconds between checks for worker processes that died
+WATCHDOG_INTERVAL = 1.0
+
+
+def available_cores():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def split_cores(num_workers, cores_per_worker=None):
+    """
+    Give each worker a contiguous slice of the cores this process may use
+    """
+    cores = available_cores()
+    if cores_per_worker is None:
+        cores_per_worker = max(1, len(cores) // num_workers)
+
+    slices = []
+    for i in range(num_workers):
+        start = (i * cores_per_worker) % len(cores)
+        slices.append([cores[(start + j) % len(cores)] for j in range(cores_per_worker)])
+    return slices
+
+
+def _pin_worker(cores):
+    # Must happen before torch / onnxruntime / openvino are imported
+    threads = str(len(cores))
+    os.environ["OMP_NUM_THREADS"] = threads
+    os.environ["MKL_NUM_THREADS"] = threads
+
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+
+
+def _process_request(img_bytes):
+    from src import inference
+    from src.analyzer import analyze
+    from src.image_io import ImageTooLarge, decode_upload
+
+    try:
+        upload = decode_upload(img_bytes)
+    except ImageTooLarge as e:
+        return 413, {"error": str(e)}
+    if upload is None:
+        return 400, {"error": "Invalid image"}
+
+    return 200, analyze(upload.image, inference.detect(upload.image), crop_source=upload.crop)
+
+
+def _worker_main(worker_id, cores, task_queue, event_queue):
+    _pin_worker(cores)
+
+    from src import inference, ocr_processor
+
+    try:
+        import torch
+        torch.set_num_threads(len(cores))
+    except ImportError:
+        pass
+
+    inference.warmup()
+    ocr_processor.warmup()
+    event_queue.put(("ready", worker_id, None, None))
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+
+        task_id, img_bytes = task
+        event_queue.put(("start", worker_id, task_id, None))
+
+        try:
+            result = (True, _process_request(img_bytes))
+        except Exception as e:
+            result = (False, repr(e))
+
+        event_queue.put(("done", worker_id, task_id, result))
+
+
+class WorkerPool:
+    """
+    Dispatches encoded images to N worker processes and returns
+    (status_code, response) tuples through futures.
+    A worker process that dies fails its in-flight request and is
+    replaced by a fresh one.
+    """
+
+    def __init__(self, num_workers, cores_per_worker=None):
+        if num_workers < 1:
+            raise ValueError("num_workers must be >= 1")
+
+        self.num_workers = num_workers
+        self.core_slices = split_cores(num_workers, cores_per_worker)
+
+        # spawn: each worker imports the models fresh instead of
+        # inheriting a forked copy of the parent's torch state
+        self._ctx = mp.get_context("spawn")
+        self._task_queue = self._ctx.Queue()
+        self._event_queue = self._ctx.Queue()
+
+        self._processes = []
+        self._pending = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._listener = None
+        self._stopping = False
+
+        self._workers = {
+            i: {
+                "cores": cores,
+                "state": "starting",
+                "current_task": None,
+                "processed": 0,
+                "errors": 0,
+                "restarts": 0,
+                "last_seen": None
+            }
+            for i, cores in enumerate(self.core_slices)
+        }
+
+    def _spawn(self, worker_id):
+        p = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, self.core_slices[worker_id], self._task_queue, self._event_queue),
+            name=f"inference-worker-{worker_id}",
+            daemon=True
+        )
+        p.start()
+        return p
+
+    def start(self):
+        for i in range(self.num_workers):
+            self._processes.append(self._spawn(i))
+
+        self._listener = threading.Thread(target=self._listen, name="worker-pool-events", daemon=True)
+        self._listener.start()
+        print(f"[INFO] Started {self.num_workers} inference workers")
+
+    def submit(self, img_bytes):
+        future = Future()
+        with self._lock:
+            task_id = next(self._ids)
+            self._pending[task_id] = future
+        self._task_queue.put((task_id, img_bytes))
+        return future
+
+    def is_ready(self):
+        with self._lock:
+            return bool(self._processes) and all(
+                p.is_alive() and self._workers[i]["state"] != "starting"
+                for i, p in enumerate(self._processes)
+            )
+
+    def status(self):
+        with self._lock:
+            workers = []
+            for i, w in self._workers.items():
+                alive = i < len(self._processes) and self._processes[i].is_alive()
+                workers.append(dict(
+                    w,
+                    id=i,
+                    pid=self._processes[i].pid if alive else None,
+                    alive=alive,
+                    state=w["state"] if alive else "dead"
+                ))
+            in_flight = sum(1 for w in self._workers.values() if w["current_task"] is not None)
+
+            return {
+                "workers": workers,
+                "pending": len(self._pending),
+                "queue_depth": len(self._pending) - in_flight
+            }
+
+    def stop(self):
+        self._stopping = True
+        for _ in self._processes:
+            self._task_queue.put(None)
+        for p in self._processes:
+            p.join(timeout=10)
+        self._event_queue.put(None)
+        if self._listener is not None:
+            self._listener.join()
+
+    def _reap_dead_workers(self):
+        """
+        Fail the request a dead worker was processing and start a replacement.
+        Workers that die before warm-up finishes are not restarted.
+        """
+        failed = []
+        with self._lock:
+            if self._stopping:
+                return
+            for i, p in enumerate(self._processes):
+                worker = self._workers[i]
+                if p.is_alive() or worker["state"] == "failed":
+                    continue
+
+                if worker["state"] == "starting":
+                    # Died during warm-up (e.g. missing model): restarting would only loop
+                    print(f"[ERROR] Inference worker {i} failed to start (exit code {p.exitcode})")
+                    worker["state"] = "failed"
+                    continue
+
+                task_id = worker["current_task"]
+                if task_id is not None:
+                    future = self._pending.pop(task_id, None)
+                    if future is not None:
+                        failed.append((i, future))
+                    worker["errors"] += 1
+
+                print(f"[WARN] Inference worker {i} died (exit code {p.exitcode}), restarting")
+                worker["state"] = "starting"
+                worker["current_task"] = None
+                worker["restarts"] += 1
+                self._processes[i] = self._spawn(i)
+
+        for i, future in failed:
+            if future.set_running_or_notify_cancel():
+                future.set_exception(RuntimeError(f"Worker {i} died"))
+
+    def _listen(self):
+        next_check = time.monotonic() + WATCHDOG_INTERVAL
+        while True:
+            # Checked on a clock, not only when idle, so a busy pool notices too
+            if time.monotonic() >= next_check:
+                self._reap_dead_workers()
+                next_check = time.monotonic() + WATCHDOG_INTERVAL
+
+            try:
+                event = self._event_queue.get(timeout=WATCHDOG_INTERVAL)
+            except queue.Empty:
+                continue
+            if event is None:
+                return
+
+            kind, worker_id, task_id, result = event
+            future = None
+
+            with self._lock:
+                worker = self._workers[worker_id]
+                worker["last_seen"] = time.time()
+
+                if kind == "ready":
+                    worker["state"] = "idle"
+                elif kind == "start":
+                    worker["state"] = "busy"
+                    worker["current_task"] = task_id
+                elif kind == "done":
+                    worker["state"] = "idle"
+                    worker["current_task"] = None
+                    worker["processed"] += 1
+                    future = self._pending.pop(task_id, None)
+
+            # Skip futures the caller already cancelled (e.g. an asyncio timeout);
+            # resolving them would raise InvalidStateError and kill this thread
+            if future is None or not future.set_running_or_notify_cancel():
+                continue
+
+            ok, payload = result
+            if ok:
+                future.set_result(payload)
+            else:
+                with self._lock:
+                    worker["errors"] += 1
+                future.set_exception(RuntimeError(f"Worker {worker_id} failed: {payload}"))